@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the AI hot paths
+Run this from the repository root: python3 bench_ai.py [name ...]
+"""
+
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src", "ai"))
+
+from network_client import LineFramer
+import resources
+from resources import parse_look
+from team_codec import TeamCodec, pid_hash
+from vision_geometry import TILE_COUNT, TILE_ACTIONS, WORLD_DELTAS, tile_actions
+
+STONES = ["linemate", "deraumere", "sibur", "mendiane", "phiras", "thystame"]
+
+def synthetic_look(level, items_per_tile=6):
+    """Build a Look reply for the given vision depth with busy tiles"""
+    tiles = []
+    for i in range((level + 1) ** 2):
+        items = ["player"] if i == 0 else []
+        items += ["food"] * (i % 3)
+        items += [STONES[(i + k) % len(STONES)] for k in range(items_per_tile)]
+        tiles.append(" ".join(items))
+    return "[" + ", ".join(tiles) + "]"
+
+def synthetic_stream(size_bytes):
+    """Mix of level-8 Look replies, broadcast bursts and ok/ko replies"""
+    look = synthetic_look(8)
+    pieces = []
+    total = 0
+    i = 0
+    while total < size_bytes:
+        if i % 10 == 0:
+            line = look
+        elif i % 3 == 0:
+            line = f"message {i % 9}, BCAST_INV_SHARE;pid=team_{i};lvl=3;inv={{\"linemate\":1}}"
+        else:
+            line = "ok" if i % 7 else "ko"
+        pieces.append(line)
+        total += len(line) + 1
+        i += 1
+    return ("\n".join(pieces) + "\n").encode("utf-8"), len(pieces)
+
+class StreamSocket:
+    """Socket stand-in replaying a byte stream, at most chunk_size bytes per read"""
+
+    def __init__(self, stream, chunk_size):
+        self.view = memoryview(stream)
+        self.offset = 0
+        self.chunk_size = chunk_size
+
+    def recv(self, size):
+        size = min(size, self.chunk_size)
+        data = self.view[self.offset:self.offset + size].tobytes()
+        self.offset += len(data)
+        return data
+
+    def recv_into(self, buffer):
+        size = min(len(buffer), self.chunk_size, len(self.view) - self.offset)
+        buffer[:size] = self.view[self.offset:self.offset + size]
+        self.offset += size
+        return size
+
+class LegacyStrFramer:
+    """The former receive path: str concatenation and split('\\n', 1) per line"""
+
+    def __init__(self, chunk_size):
+        self.chunk_size = chunk_size
+        self.receive_buffer = ""
+
+    def recv_from(self, sock):
+        data = sock.recv(self.chunk_size)
+        if not data:
+            return None
+        self.receive_buffer += data.decode("utf-8")
+        lines = []
+        while '\n' in self.receive_buffer:
+            message, self.receive_buffer = self.receive_buffer.split('\n', 1)
+            lines.append(message)
+        return lines
+
+def legacy_parse_vision(vision_string):
+    """The former FastVisionParser: substring tests per resource name, presence only"""
+    tiles = [tile.strip() for tile in vision_string.strip('[]').split(',')]
+    food_locations = []
+    stone_locations = []
+    player_locations = []
+    for i, tile_content in enumerate(tiles):
+        if not tile_content:
+            continue
+        if 'food' in tile_content:
+            food_locations.append(i)
+        for stone in STONES:
+            if stone in tile_content:
+                stone_locations.append((i, stone))
+        if 'player' in tile_content:
+            player_locations.append(i)
+    return food_locations, stone_locations, player_locations
+
+def legacy_actions_to_reach_tile(target_tile_index):
+    """The former DirectMovement path: find the cone row with a while loop on every call"""
+    if target_tile_index == 0:
+        return []
+    level = 0
+    start_index_of_level = 0
+    tiles_in_level = 1
+    while start_index_of_level + tiles_in_level <= target_tile_index:
+        start_index_of_level += tiles_in_level
+        level += 1
+        tiles_in_level = 2 * level + 1
+    actions = ["Forward"] * level
+    position_in_level = target_tile_index - start_index_of_level
+    center_of_level = tiles_in_level // 2
+    if position_in_level < center_of_level:
+        actions.append("Left")
+        actions += ["Forward"] * (center_of_level - position_in_level)
+    elif position_in_level > center_of_level:
+        actions.append("Right")
+        actions += ["Forward"] * (position_in_level - center_of_level)
+    return actions
+
+def legacy_inventory_broadcast(pid, level, inventory):
+    """The former BCAST_INV_SHARE text message with a JSON inventory"""
+    inv_str = json.dumps(inventory, separators=(',', ':'))
+    return f"BCAST_INV_SHARE;pid={pid};lvl={level};inv={inv_str}"
+
+def legacy_parse_broadcast(raw_message):
+    """The former parse path: split into key=value pairs, then json.loads"""
+    parts = raw_message.split(";", 1)
+    data = {}
+    if len(parts) > 1:
+        for item in parts[1].split(";"):
+            kv = item.split("=", 1)
+            if len(kv) == 2:
+                data[kv[0]] = kv[1]
+    if parts[0] != "BCAST_INV_SHARE" or "inv" not in data:
+        return None
+    return {"pid": data.get("pid"), "level": int(data.get("lvl", 0)), "inventory": json.loads(data["inv"])}
+
+class AIBenchmark:
+    def __init__(self):
+        self.results = []
+
+    def report(self, name, value, unit):
+        self.results.append((name, value, unit))
+        print(f"{name:<48} {value:>14,.0f} {unit}")
+
+    def bench_framing(self, size_mb=4):
+        """Lines/sec of the receive framer on a multi-MB synthetic stream"""
+        print(f"\n=== Receive framing ({size_mb} MB stream) ===")
+        stream, line_count = synthetic_stream(size_mb * 1024 * 1024)
+
+        for chunk_size in (1024, 4096, 65536):
+            for label, framer in (("str concat + split", LegacyStrFramer(chunk_size)),
+                                  ("bytearray LineFramer", LineFramer(chunk_size))):
+                sock = StreamSocket(stream, chunk_size)
+                start = time.perf_counter()
+                count = 0
+                lines = framer.recv_from(sock)
+                while lines is not None:
+                    count += len(lines)
+                    lines = framer.recv_from(sock)
+                elapsed = time.perf_counter() - start
+                assert count == line_count, (label, count, line_count)
+                self.report(f"{label} (chunk {chunk_size})", count / elapsed, "lines/s")
+
+    def bench_look_parse(self, replies=5000):
+        """Level-8 Look replies/sec: substring parser vs one-pass count matrix"""
+        print(f"\n=== Look parsing ({replies} level-8 replies) ===")
+        for items in (2, 6, 12):
+            reply = synthetic_look(8, items_per_tile=items)
+            look = parse_look(reply)
+            assert look.locations("food") == legacy_parse_vision(reply)[0]
+
+            def parse_cold(reply):
+                resources._TILE_ROWS.clear()
+                return parse_look(reply)
+
+            for label, parse in (("substring presence parser", legacy_parse_vision),
+                                 ("count matrix, cold tile cache", parse_cold),
+                                 ("count matrix, warm tile cache", parse_look)):
+                start = time.perf_counter()
+                for _ in range(replies):
+                    parse(reply)
+                elapsed = time.perf_counter() - start
+                self.report(f"{label} ({items} items/tile)", replies / elapsed, "replies/s")
+
+    def bench_broadcast_codec(self, messages=50000):
+        """Inventory broadcast length and encode/decode rate: JSON text vs compact codec"""
+        print(f"\n=== Inventory broadcasts ({messages} messages) ===")
+        inventory = {stone: i % 4 for i, stone in enumerate(STONES)}
+        legacy_pid = f"team_{int(time.time() * 1000)}"
+        pid = pid_hash(legacy_pid)
+        codec = TeamCodec("team")
+        foreign = TeamCodec("other team").encode_inventory(pid, 4, inventory)
+
+        legacy_message = legacy_inventory_broadcast(legacy_pid, 4, inventory)
+        message = codec.encode_inventory(pid, 4, inventory)
+        assert codec.decode(message)["inventory"] == legacy_parse_broadcast(legacy_message)["inventory"]
+        assert codec.decode(foreign) is None
+        self.report("JSON message length", len(legacy_message), "chars")
+        self.report("codec message length", len(message), "chars")
+
+        for label, call in (("JSON encode", lambda: legacy_inventory_broadcast(legacy_pid, 4, inventory)),
+                            ("codec encode", lambda: codec.encode_inventory(pid, 4, inventory)),
+                            ("JSON decode", lambda: legacy_parse_broadcast(legacy_message)),
+                            ("codec decode", lambda: codec.decode(message)),
+                            ("JSON parse of a foreign message", lambda: legacy_parse_broadcast(foreign)),
+                            ("codec reject of a foreign message", lambda: codec.decode(foreign))):
+            start = time.perf_counter()
+            for _ in range(messages):
+                call()
+            elapsed = time.perf_counter() - start
+            self.report(label, messages / elapsed, "msgs/s")
+
+    def bench_vision_lookup(self, rounds=2000):
+        """Per-lookup cost of tile index -> actions / world delta, over all 81 level-8 tiles"""
+        print(f"\n=== Vision geometry lookups ({rounds} x {TILE_COUNT} tiles) ===")
+        indices = range(TILE_COUNT)
+        for index in indices:
+            assert legacy_actions_to_reach_tile(index) == list(TILE_ACTIONS[index]), index
+
+        for label, lookup in (("while-loop actions", legacy_actions_to_reach_tile),
+                              ("LUT actions", tile_actions),
+                              ("LUT world delta", WORLD_DELTAS[1].__getitem__)):
+            start = time.perf_counter()
+            for _ in range(rounds):
+                for index in indices:
+                    lookup(index)
+            elapsed = time.perf_counter() - start
+            self.report(label, elapsed / (rounds * TILE_COUNT) * 1e9, "ns/lookup")
+
+    def run_all(self, names=None):
+        benches = [attr for attr in dir(self) if attr.startswith("bench_")]
+        for attr in benches:
+            if not names or attr[len("bench_"):] in names:
+                getattr(self, attr)()
+
+def main():
+    AIBenchmark().run_all(sys.argv[1:])
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,18 @@
-from concurrent.futures import process
-import re
-import math
 import random
 from itertools import cycle
 import json
 from collections import Counter
-import re
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "ai"))
+
+from vision_geometry import SEARCH_ORDER, TILE_ACTIONS
+from requirements import MAX_LEVEL, stone_requirements
 
 RESOURCES = ["linemate", "deraumere", "sibur", "mendiane", "phiras", "thystame"]
 
-LVLS = {1: {"linemate": 1},
-        2: {"linemate": 1, "deraumere": 1, "sibur": 1},
-        3: {"linemate": 2, "sibur": 1, "phiras": 2},
-        4: {"linemate": 1, "deraumere": 1, "sibur": 2, "phiras": 1},
-        5: {"linemate": 1, "deraumere": 2, "sibur": 1, "mendiane": 3},
-        6: {"linemate": 1, "deraumere": 2, "sibur": 3, "phiras": 1},
-        7: {"linemate": 2, "deraumere": 2, "sibur": 2, "mendiane": 2, "phiras": 2, "thystame": 1},
-}
+LVLS = {level: stone_requirements(level) for level in range(1, MAX_LEVEL)}
 
 class IA:
     """The IA class encapsulates the intelligence of the player"""
@@ -128,91 +124,6 @@ class IA:
         self.shared_inventory['total'] = dict(c)
 
         
-    def size_look(self, array: list) -> int:
-        """Get the size of the array
-        Args:
-            array (list): the array
-        Returns:
-            int: the size of the array
-        """
-        nb = 0
-        for elem in array:
-            if elem == []:
-                return nb
-            nb += 1
-        return nb
-
-    def find_object(self, map: list, object: str) -> list:
-        """Find the object in the map
-        Args:
-            map (list): the map
-            object (str): the object
-        Returns:
-            list: coord x y of the object
-        """
-
-        v = 8
-        h = 0
-        while h < self.size_look(map[v]):
-            if map[v][h] != [] and object in map[v][h][0]:
-                return [v, h]
-            else:
-                h += 1
-            tv = v
-            while tv >= v-h:
-                if map[v][h] != [] and object in map[tv][h][0]:
-                    return [tv, h]
-                tv -= 1
-            tv = v
-            while tv <= v+h:
-                if map[v][h] != [] and object in map[tv][h][0]:
-                    return [tv, h]
-                tv += 1
-            h+=1
-        return None
-
-    def get_nb_of_lines(self, data: list) -> int:
-        """Get the number of line in the array
-        Args:
-            data (list): the array
-        Returns:
-            int: the number of line
-        """
-        data_len = len(data)
-        return int(math.sqrt(data_len))
-
-    def fill_map(self, map: list, data: list) -> list:
-        """Fill the map with the object position
-        Args:
-            map (list): the map
-            data (list): the array of object position
-        return :
-            array: the map
-        """
-        nb = 1
-        v = 8
-        h = 0
-        i = 0
-        x = 0
-
-        line = self.get_nb_of_lines(data)
-        for j in range(line):
-            tv = v - h
-            for a in range(nb):
-                map[tv][h].append(data[i])
-                tv += 1
-                i += 1
-            nb = (nb + 2)
-            h += 1
-        return map
-
-    def generate_empty_map(self) -> list:
-        """Generate an empty map
-        Returns:
-            array: the empty map
-        """
-        return [[[] for i in range(9)] for j in range(17)]
-
     def split_data(self, data: str) -> list:
         """Split the look command
         Args:
@@ -234,44 +145,20 @@ class IA:
         Returns:
             array: the list of object position
         """
-        data1 = data.split(",")
-        liste = []
-        for i in range(len(data1)):
-            liste.append(' '.join(re.split('\W+', data1[i])[1:]))
-        data = liste
-        map = self.generate_empty_map()
-        map = self.fill_map(map, data)
-        coord = self.find_object(map, object)
+        tiles = data.strip().strip("[]").split(",")
+        index = next((i for i in SEARCH_ORDER if i < len(tiles) and object in tiles[i].split()), None)
         res = []
-        if (coord == None):
+        if (index == None):
             res.append(random.choice(["Forward\n", "Right\n", "Left\n"]))
             res.append(random.choice(["Forward\n", "Right\n", "Left\n"]))
             res.append(random.choice(["Forward\n", "Right\n", "Left\n"]))
             return res
-        elif (coord[0] == 8 and coord[1] == 0):
+        elif (index == 0):
             return ["Take " + object + "\n"]
-        else:
-            for i in range(int(coord[0]) - 8):
-                res.append("Forward\n")
-            if (coord[0] == 8):
-                for i in range(int(coord[1])):
-                    res.append("Forward\n")
-                res.append("Take " + object + "\n")
-                res.append("Inventory\n")
-            if (coord[1] == 0):
-                res.append("Take " + object + "\n")
-            if (int(coord[0]) < 8):
-                res.append("Left\n")
-                for i in range(8 - int(coord[0])):
-                    res.append("Forward\n")
-                res.append("Take " + object + "\n")
-                res.append("Inventory\n")
-            if (int(coord[0]) > 8):
-                res.append("Right\n")
-                for i in range(int(coord[0]) - 8):
-                    res.append("Forward\n")
-                res.append("Take " + object + "\n")
-                res.append("Inventory\n")
+        for action in TILE_ACTIONS[index]:
+            res.append(action + "\n")
+        res.append("Take " + object + "\n")
+        res.append("Inventory\n")
         return res
 
     def parse_broadcast(self, message):
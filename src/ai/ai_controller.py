@@ -2,168 +2,307 @@ import time
 import sys
 import random
 import re
-import json
-from network_client import NetworkClient
+import resource
+from event_loop import EventLoop
+from network_client import NetworkClient, CommandPriority
+from time_model import TimeModel
+from team_codec import TeamCodec, SEQ_MODULO, pid_hash
+from team_registry import TeammateRegistry
+from requirements import MAX_LEVEL, RequirementEngine
+from world_map import WorldMap
+from navigation import PathPlanner, STEP_COST
+from pipeline import PipelineExecutor
+from exploration import FrontierExplorer
+from resources import RESOURCES, RESOURCE_INDEX, TILE_FIELDS, FIELD_INDEX, InventoryLedger, parse_look, parse_inventory
+
+def process_usage():
+    """CPU seconds and peak resident memory (MB) consumed by this process so far"""
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    rss_mb = usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    return {"cpu": usage.ru_utime + usage.ru_stime, "rss_mb": rss_mb}
+
+FOOD_UNITS = 126  # Time units of life given by one food
 
 class SimpleSurvivalManager:
-    """Manages basic food collection and survival mode determination"""
+    """Predicts remaining lifetime in time units and the budget left for non-food work.
+
+    The food count from the last Inventory anchors the lifetime; from there it
+    drains by the game time elapsed, or by the cost of every command issued
+    since the anchor if that is larger (commands queued now will run whatever
+    happens). Food taken adds FOOD_UNITS. Once HUNGRY, only a fresh Inventory
+    brings us back to SAFE: the prediction alone never does.
+    """
     
-    def __init__(self):
+    def __init__(self, time_model=None):
+        self.time_model = time_model if time_model is not None else TimeModel()
         self.food_count = 10
         self.food_collected = 0
         
+        self.anchor_units = 10 * FOOD_UNITS   # Lifetime at the anchor
+        self.anchor_time = time.time()
+        self.issued_units = 0                 # Command costs issued since the anchor
+        
+        self.reserve_units = 5 * FOOD_UNITS   # Kept back to find food: below this we are HUNGRY
+        self.comfort_units = 12 * FOOD_UNITS  # Below this, visible food is worth a detour
+        self.hoard_units = 30 * FOOD_UNITS    # Above this, even food underfoot is left alone
+        self.hungry_since = None              # When we last turned HUNGRY, until an Inventory clears it
+        
     def record_food_collected(self):
         """Track when food is successfully collected"""
         self.food_collected += 1
+        self.anchor_units += FOOD_UNITS
         print(f"FOOD +1! Total: {self.food_collected}")
+    
+    def record_command(self, units):
+        """Account for the game time a newly issued command will consume"""
+        self.issued_units += units
+    
+    def record_cancelled(self, units):
+        """Give back the game time of commands withdrawn before transmission"""
+        self.issued_units = max(0, self.issued_units - units)
         
-    def update_from_inventory(self, inventory_response):
-        """Update internal food count from server inventory response"""
-        food_match = re.search(r'food (\d+)', inventory_response)
-        if food_match:
-            new_count = int(food_match.group(1))
-            if new_count != self.food_count:
-                print(f"Food: {self.food_count} → {new_count}")
-            self.food_count = new_count
+    def update_from_inventory(self, snapshot, outstanding_units=0):
+        """Re-anchor the lifetime on the food count of an InventorySnapshot.
+        outstanding_units is the cost of commands still queued behind that reply."""
+        new_count = snapshot.get("food")
+        if new_count != self.food_count:
+            print(f"Food: {self.food_count} → {new_count}")
+        self.food_count = new_count
+        self.anchor_units = new_count * FOOD_UNITS
+        self.anchor_time = time.time()
+        self.issued_units = outstanding_units
+    
+    def remaining_units(self):
+        """Predicted lifetime left once every issued command has run"""
+        elapsed = max(self.time_model.units_since(self.anchor_time), self.issued_units)
+        return self.anchor_units - elapsed
+    
+    def predicted_food(self):
+        """Food units we should currently be holding"""
+        return max(0, int(self.remaining_units() // FOOD_UNITS))
+    
+    def non_food_budget(self):
+        """Time units available for stones, rituals or exploration before food must come first"""
+        return self.remaining_units() - self.reserve_units
     
+    def can_afford(self, units):
+        """Check if a plan of the given cost fits in the non-food budget"""
+        return self.non_food_budget() >= units
+    
+    def wants_food_detour(self):
+        """Check if moving towards visible food is worth it"""
+        return self.remaining_units() < self.comfort_units
+    
+    def wants_food_here(self):
+        """Check if food on our own tile is worth a Take"""
+        return self.remaining_units() < self.hoard_units
+    
+    def needs_confirmation(self):
+        """Check if the prediction says SAFE again but no Inventory has confirmed it"""
+        return (self.hungry_since is not None and self.anchor_time <= self.hungry_since
+                and self.non_food_budget() > 0)
+
     def get_mode(self):
-        """Return current survival mode based on food count"""
-        return "SAFE" if self.food_count >= 9 else "HUNGRY"
+        """Return current survival mode based on the predicted lifetime"""
+        if self.non_food_budget() <= 0:
+            if self.hungry_since is None or self.anchor_time > self.hungry_since:
+                self.hungry_since = time.time()
+            return "HUNGRY"
+        if self.hungry_since is not None:
+            if self.anchor_time <= self.hungry_since:
+                return "HUNGRY"
+            self.hungry_since = None
+        return "SAFE"
 
 import time
-from collections import Counter
+from collections import Counter, deque
 
 class PlayerState:
-    """Tracks player level, inventory, and team resources for elevation rituals"""
+    """Tracks player level, inventory, and team resources for elevation rituals.
+
+    Teammates' stones are kept as fixed-length vectors in RESOURCES order and
+    their sum is maintained by deltas, so a broadcast costs O(resources)
+    rather than O(team). Which teammates are still live is decided by the
+    TeammateRegistry in teammates: it calls forget_teammate() when one expires.
+    """
     
-    def __init__(self, player_id=None):
+    def __init__(self, player_id=None, time_model=None):
         self.level = 1
         self.player_id = player_id if player_id is not None else str(time.time())
+        self.time_model = time_model if time_model is not None else TimeModel()
         self.inventory = {
             "food": 10, "linemate": 0, "deraumere": 0,
             "sibur": 0, "mendiane": 0, "phiras": 0, "thystame": 0
         }
-        self.team_inventories = {}
+        self.snapshot = None
         self.shared_inventory = self.inventory.copy()
+        
+        self.team_vectors = {}                 # pid -> [count per RESOURCES], food left at 0
+        self.team_totals = [0] * len(RESOURCES)
+        self.teammates = None                  # TeammateRegistry, attached by BroadcastManager
+        
+        # Bumped whenever our own or a teammate's stones change; keys the requirement cache
+        self.version = 0
 
-        self.elevation_requirements = {
-            1: {"players": 1, "linemate": 1, "deraumere": 0, "sibur": 0, "mendiane": 0, "phiras": 0, "thystame": 0},
-            2: {"players": 2, "linemate": 1, "deraumere": 1, "sibur": 1, "mendiane": 0, "phiras": 0, "thystame": 0},
-            3: {"players": 2, "linemate": 2, "deraumere": 0, "sibur": 1, "mendiane": 0, "phiras": 2, "thystame": 0},
-            4: {"players": 4, "linemate": 1, "deraumere": 1, "sibur": 2, "mendiane": 0, "phiras": 1, "thystame": 0},
-            5: {"players": 4, "linemate": 1, "deraumere": 2, "sibur": 1, "mendiane": 3, "phiras": 0, "thystame": 0},
-            6: {"players": 6, "linemate": 1, "deraumere": 2, "sibur": 3, "mendiane": 0, "phiras": 1, "thystame": 0},
-            7: {"players": 6, "linemate": 2, "deraumere": 2, "sibur": 2, "mendiane": 2, "phiras": 2, "thystame": 1}
-        }
+        self.requirements = RequirementEngine()
 
-    def update_from_inventory(self, inventory_response):
-        """Parse inventory response from server and update internal state"""
+    def update_from_inventory(self, snapshot):
+        """Adopt an InventorySnapshot as our own inventory"""
+        self.snapshot = snapshot
         changed = False
-        for resource in self.inventory.keys():
-            match = re.search(rf'{resource} (\d+)', inventory_response)
-            if match:
-                new_count = int(match.group(1))
-                if self.inventory.get(resource, 0) != new_count:
-                    if resource != "food":
-                         print(f"My {resource}: {self.inventory.get(resource, 0)} → {new_count}")
-                    self.inventory[resource] = new_count
-                    changed = True
+        for name, new_count in zip(RESOURCES, snapshot.counts):
+            if self.inventory.get(name, 0) != new_count:
+                if name != "food":
+                     print(f"My {name}: {self.inventory.get(name, 0)} → {new_count}")
+                self.inventory[name] = new_count
+                self._refresh_shared(name)
+                changed = True
         if changed:
-            self._recalculate_shared_inventory()
+            self.version += 1
 
     def update_teammate_inventory(self, teammate_id, inventory_data):
-        """Update a teammate's inventory data and recalculate shared resources"""
+        """Replace a teammate's stones, applying only the difference to the shared totals"""
         if teammate_id == self.player_id:
             return
 
-        self.team_inventories[teammate_id] = inventory_data.copy()
-        self._recalculate_shared_inventory()
-
-    def _recalculate_shared_inventory(self):
-        """Recalculate the combined inventory of self and all teammates"""
-        combined = Counter()
-        combined.update(self.inventory)
-        for teammate_inv in self.team_inventories.values():
-            combined.update(teammate_inv)
+        new = [0] + [int(inventory_data.get(stone, 0)) for stone in RESOURCES[1:]]
+        self._apply_teammate(teammate_id, new)
+
+    def forget_teammate(self, pid):
+        """Drop the stones of a teammate the registry no longer considers live"""
+        if pid in self.team_vectors:
+            print(f"Teammate {pid} silent, dropping its stones from the shared inventory")
+            self._apply_teammate(pid, None)
+
+    def _apply_teammate(self, pid, new):
+        """Swap a teammate's vector (None removes it) and patch the totals by the delta"""
+        old = self.team_vectors.pop(pid, None) if new is None else self.team_vectors.get(pid)
+        if new is not None:
+            self.team_vectors[pid] = new
+        old = old or [0] * len(RESOURCES)
+        new = new or [0] * len(RESOURCES)
+        changed = False
+        for index, (before, after) in enumerate(zip(old, new)):
+            if before != after:
+                self.team_totals[index] += after - before
+                self._refresh_shared(RESOURCES[index])
+                changed = True
+        if changed:
+            self.version += 1
 
-        self.shared_inventory = {res: count for res, count in combined.items() if res != "food"}
-        for stone in self.elevation_requirements[1].keys():
-            if stone not in self.shared_inventory and stone != "players" and stone != "food":
-                self.shared_inventory[stone] = 0
-        self.shared_inventory["food"] = self.inventory.get("food", 0)
+    def _refresh_shared(self, resource):
+        """Shared count of one resource: ours plus teammates' (food is ours only)"""
+        own = self.inventory.get(resource, 0)
+        if resource == "food":
+            self.shared_inventory[resource] = own
+        else:
+            self.shared_inventory[resource] = own + self.team_totals[RESOURCE_INDEX[resource]]
 
     def can_elevate(self, use_shared_inventory=True):
         """Check if required stones are available for next level elevation"""
-        if self.level >= 8:
+        if self.level >= MAX_LEVEL:
             return False
-
-        requirements = self.elevation_requirements.get(self.level, {})
-        inventory_to_check = self.shared_inventory if use_shared_inventory else self.inventory
-
-        for stone, needed in requirements.items():
-            if stone != "players" and needed > 0:
-                if inventory_to_check.get(stone, 0) < needed:
-                    return False
-        return True
+        return not self._missing(use_shared_inventory)
 
     def get_missing_stones(self, use_shared_inventory=True):
         """Get list of stones still needed for next level elevation"""
-        if self.level >= 8:
-            return []
-
-        requirements = self.elevation_requirements.get(self.level, {})
+        return list(self._missing(use_shared_inventory))
+
+    def _missing(self, use_shared_inventory):
+        """Missing stones as a tuple, recomputed only when level or version changed"""
+        if use_shared_inventory and self.teammates is not None:
+            self.teammates.expire()
+        if self.level >= MAX_LEVEL:
+            return ()
         inventory_to_check = self.shared_inventory if use_shared_inventory else self.inventory
-        missing = []
+        return self.requirements.missing(self.level, (self.version, use_shared_inventory),
+                                         lambda: [inventory_to_check.get(r, 0) for r in RESOURCES])
 
-        for stone, needed in requirements.items():
-            if stone != "players" and needed > 0:
-                have = inventory_to_check.get(stone, 0)
-                if have < needed:
-                    missing.extend([stone] * (needed - have))
-        return missing
+    def smallest_helping_group(self, level=None):
+        """Fewest known teammates whose stones, with ours, cover a level (None if impossible)"""
+        own = [self.inventory.get(r, 0) for r in RESOURCES]
+        own[0] = 0
+        return self.requirements.smallest_group(level or self.level, own, self.team_vectors)
 
 class BroadcastManager:
     """Handles team communication through broadcast messages"""
     
-    def __init__(self, player_id, player_state_ref):
+    def __init__(self, player_id, player_state_ref, scheduler, time_model=None, team=""):
         self.player_id = player_id
+        self.codec = TeamCodec(team)
         self.player_state = player_state_ref
-        self.last_broadcast = 0
-        self.broadcast_interval = 15
-        self.teammates = {}
+        self.time_model = time_model if time_model is not None else TimeModel()
+        self.scheduler = scheduler
+        self.broadcast_interval = 1500  # time units
+        self.broadcast_due = True       # set again by a timer broadcast_interval after each broadcast
+        self.teammates = TeammateRegistry(self.time_model, timeout=3000)
+        
+        self.seq = 0                 # our own sequence number, stamped on every team message
+        self.last_seq = {}           # sender pid -> newest sequence number accepted
+        self.dropped_stale = 0
+        self.rejected = 0
+        self.handler_stats = {}      # message type -> [messages, seconds spent]
+        
+        # Message prefix -> parser returning a dict with at least "type" (no side effects)
+        self.handlers = {}
+        self.register_handler(self.codec.tag, self._parse_compact)
+        self.register_handler("BCAST_INC_INIT", self._parse_inc_init)
+        self.register_handler("BCAST_INC_JOIN", self._parse_inc_join)
+        self.register_handler("BCAST_INC_READY", self._parse_inc_ready)
+        self.register_handler("BCAST_INC_CONFIRM", self._parse_inc_confirm)
+        self.register_handler("L", self._parse_legacy_status)
+        self.teammates.on_forget.append(lambda pid: self.last_seq.pop(pid, None))
+        # The registry alone decides when a teammate's stones leave the shared totals
+        self.player_state.teammates = self.teammates
+        self.teammates.on_forget.append(self.player_state.forget_teammate)
+        
+    def register_handler(self, prefix, parser):
+        """Route messages starting with prefix (the type before the first ';') to parser"""
+        self.handlers[prefix] = parser
         
     def should_broadcast(self):
-        """Check if enough time has passed since last broadcast"""
-        return time.time() - self.last_broadcast > self.broadcast_interval
+        """Check if enough game time has passed since last broadcast"""
+        return self.broadcast_due
+    
+    def mark_broadcast_sent(self):
+        """Start a new broadcast interval"""
+        self.broadcast_due = False
+        self.scheduler.call_later(self.time_model.seconds(self.broadcast_interval), self._on_broadcast_due)
+    
+    def _on_broadcast_due(self):
+        self.broadcast_due = True
+    
+    def _next_seq(self):
+        self.seq = (self.seq + 1) % SEQ_MODULO
+        return self.seq
+    
+    def _text_message(self, msg_type, **fields):
+        """Text team message: type, our pid and sequence number, then key=value fields"""
+        items = [msg_type, f"pid={self.player_id}", f"seq={self._next_seq()}"]
+        items += [f"{key}={value}" for key, value in fields.items()]
+        return ";".join(items)
     
     def create_inventory_broadcast(self):
-        """Create broadcast message sharing current inventory and level"""
-        essential_inventory = {
-            k: v for k, v in self.player_state.inventory.items() if k != "food"
-        }
-        inv_str = json.dumps(essential_inventory, separators=(',', ':'))
-        message = f"BCAST_INV_SHARE;pid={self.player_id};lvl={self.player_state.level};inv={inv_str}"
-        return message
+        """Create compact broadcast message sharing current stones and level"""
+        return self.codec.encode_inventory(self.player_id, self.player_state.level, self.player_state.inventory,
+                                           self._next_seq())
 
     def create_incantation_initiate_broadcast(self):
         """Create broadcast announcing intent to start an incantation"""
-        message = f"BCAST_INC_INIT;pid={self.player_id};lvl={self.player_state.level}"
-        return message
+        return self._text_message("BCAST_INC_INIT", lvl=self.player_state.level)
 
     def create_incantation_join_broadcast(self, initiator_id):
         """Create broadcast announcing intent to join someone's incantation"""
-        message = f"BCAST_INC_JOIN;pid={self.player_id};target_lvl={self.player_state.level};init_pid={initiator_id}"
-        return message
+        return self._text_message("BCAST_INC_JOIN", target_lvl=self.player_state.level, init_pid=initiator_id)
 
     def create_incantation_ready_broadcast(self, tile_checksum="not_impl"):
         """Create broadcast announcing readiness for incantation at current location"""
-        message = f"BCAST_INC_READY;pid={self.player_id};lvl={self.player_state.level};chksum={tile_checksum}"
-        return message
+        return self._text_message("BCAST_INC_READY", lvl=self.player_state.level, chksum=tile_checksum)
 
     def create_incantation_confirm_broadcast(self):
         """Create broadcast confirming that incantation is starting"""
-        message = f"BCAST_INC_CONFIRM;pid={self.player_id};lvl={self.player_state.level}"
-        return message
+        return self._text_message("BCAST_INC_CONFIRM", lvl=self.player_state.level)
 
     def create_legacy_status_broadcast(self, mode):
         """Create legacy format status broadcast for basic teammate information"""
@@ -173,73 +312,97 @@ class BroadcastManager:
         message = f"L{self.player_state.level}:{ready_for_elevation_team}:{missing_team_str}:{mode}"
         return message
 
+    def _handler_for(self, raw_message):
+        """Pick the parser for a message, or None if no registered prefix matches"""
+        handler = self.handlers.get(raw_message.partition(";")[0])
+        if handler:
+            return handler
+        if raw_message[:1] == "L" and ":" in raw_message:
+            return self.handlers.get("L")
+        return self.handlers.get(raw_message[:len(self.codec.tag)])
+
+    def _is_new(self, pid, seq):
+        """Accept a sender's message only if its sequence number moved forward (mod 2^16)"""
+        last = self.last_seq.get(pid)
+        if last is not None and not 0 < (seq - last) % SEQ_MODULO < SEQ_MODULO // 2:
+            return False
+        self.last_seq[pid] = seq
+        return True
+
     def parse_broadcast(self, direction, raw_message):
         """Parse incoming broadcast messages and update team state accordingly"""
+        handler = self._handler_for(raw_message)
+        if handler is None:
+            self.rejected += 1
+            return None
+        
+        start = time.perf_counter()
         try:
-            parts = raw_message.split(";", 1)
-            msg_type = parts[0]
-            payload = parts[1] if len(parts) > 1 else ""
-
-            data = {}
-            if payload:
-                for item in payload.split(";"):
-                    kv = item.split("=", 1)
-                    if len(kv) == 2:
-                        data[kv[0]] = kv[1]
-
-            sender_pid = data.get("pid")
-            if not sender_pid or sender_pid == self.player_id:
-                return None
-
-            if msg_type == "BCAST_INV_SHARE":
-                level = int(data.get("lvl", 0))
-                inv_str = data.get("inv")
-                if inv_str:
-                    try:
-                        inventory = json.loads(inv_str)
-                        if "food" not in inventory: inventory["food"] = 0
-                        self.player_state.update_teammate_inventory(sender_pid, inventory)
-                        print(f"INV from {sender_pid} (L{level}): {inventory}")
-                        return {"type": "INV_SHARE", "pid": sender_pid, "level": level, "inventory": inventory, "direction": direction}
-                    except json.JSONDecodeError:
-                        print(f"Failed to parse inventory JSON from {sender_pid}: {inv_str}")
-                return None
-
-            elif msg_type == "BCAST_INC_INIT":
-                level = int(data.get("lvl", 0))
-                print(f"INC_INIT from {sender_pid} (L{level})")
-                return {"type": "INC_INIT", "pid": sender_pid, "level": level, "direction": direction}
-
-            elif msg_type == "BCAST_INC_JOIN":
-                target_level = int(data.get("target_lvl", 0))
-                initiator_pid = data.get("init_pid")
-                print(f"INC_JOIN from {sender_pid} for L{target_level} (init: {initiator_pid})")
-                return {"type": "INC_JOIN", "pid": sender_pid, "target_level": target_level, "initiator_pid": initiator_pid, "direction": direction}
-
-            elif msg_type == "BCAST_INC_READY":
-                level = int(data.get("lvl", 0))
-                checksum = data.get("chksum")
-                print(f"INC_READY from {sender_pid} (L{level}, chksum: {checksum})")
-                return {"type": "INC_READY", "pid": sender_pid, "level": level, "checksum": checksum, "direction": direction}
-
-            elif msg_type == "BCAST_INC_CONFIRM":
-                level = int(data.get("lvl",0))
-                print(f"INC_CONFIRM from {sender_pid} (L{level})")
-                return {"type": "INC_CONFIRM", "pid": sender_pid, "level": level, "direction": direction}
-
-            legacy_parts = raw_message.split(":")
-            if len(legacy_parts) >= 3 and legacy_parts[0].startswith("L"):
-                try:
-                    level = int(legacy_parts[0][1:])
-                    status = legacy_parts[1]
-                    print(f"Legacy Teammate Status (dir {direction}): Level {level}, {status}")
-                    return {"type": "LEGACY_STATUS", "level": level, "status": status, "direction": direction, "pid": f"legacy_dir_{direction}"}
-                except ValueError:
-                    pass
-
-        except Exception as e:
+            parsed = handler(raw_message)
+        except (ValueError, KeyError) as e:
             print(f"Error parsing broadcast: '{raw_message}' - {e}")
-        return None
+            parsed = None
+        
+        if parsed is not None:
+            # Legacy status lines carry no id: they are read but never enter the registry, since
+            # the same sender is already counted through the compact broadcast sent with them
+            sender_pid = parsed.setdefault("pid", None)
+            if sender_pid == self.player_id:
+                parsed = None
+            elif "seq" in parsed and not self._is_new(sender_pid, parsed["seq"]):
+                self.dropped_stale += 1
+                parsed = None
+            else:
+                parsed["direction"] = direction
+                if parsed["type"] == "INV_SHARE":
+                    self.player_state.update_teammate_inventory(sender_pid, parsed["inventory"])
+                sender = sender_pid or f"direction {direction}"
+                print(f"{parsed['type']} from {sender} (L{parsed.get('level') or parsed.get('target_level')})")
+        
+        stats = self.handler_stats.setdefault(parsed["type"] if parsed else "dropped", [0, 0.0])
+        stats[0] += 1
+        stats[1] += time.perf_counter() - start
+        return parsed
+
+    def _fields(self, raw_message):
+        """key=value pairs of a text team message"""
+        data = {}
+        for item in raw_message.split(";")[1:]:
+            key, _, value = item.partition("=")
+            data[key] = value
+        return data
+
+    def _parse_compact(self, raw_message):
+        return self.codec.decode(raw_message)
+
+    def _parse_inc_init(self, raw_message):
+        data = self._fields(raw_message)
+        return {"type": "INC_INIT", "pid": data["pid"], "seq": int(data["seq"]), "level": int(data.get("lvl", 0))}
+
+    def _parse_inc_join(self, raw_message):
+        data = self._fields(raw_message)
+        return {"type": "INC_JOIN", "pid": data["pid"], "seq": int(data["seq"]),
+                "target_level": int(data.get("target_lvl", 0)), "init_pid": data.get("init_pid")}
+
+    def _parse_inc_ready(self, raw_message):
+        data = self._fields(raw_message)
+        return {"type": "INC_READY", "pid": data["pid"], "seq": int(data["seq"]),
+                "level": int(data.get("lvl", 0)), "checksum": data.get("chksum")}
+
+    def _parse_inc_confirm(self, raw_message):
+        data = self._fields(raw_message)
+        return {"type": "INC_CONFIRM", "pid": data["pid"], "seq": int(data["seq"]), "level": int(data.get("lvl", 0))}
+
+    def _parse_legacy_status(self, raw_message):
+        legacy_parts = raw_message.split(":")
+        if len(legacy_parts) < 3 or not legacy_parts[0][1:].isdigit():
+            return None
+        return {"type": "LEGACY_STATUS", "level": int(legacy_parts[0][1:]), "status": legacy_parts[1]}
+
+    def get_dispatch_stats(self):
+        """Per message type: count and mean handling time in microseconds"""
+        return {msg_type: {"count": count, "avg_us": seconds / count * 1e6}
+                for msg_type, (count, seconds) in self.handler_stats.items()}
 
 from enum import Enum
 
@@ -255,46 +418,96 @@ class ElevationState(Enum):
 class ElevationManager:
     """Manages multi-stage elevation ritual coordination using broadcasts"""
     
-    def __init__(self, player_id, player_state_ref, broadcast_manager_ref, send_command_callback):
+    def __init__(self, player_id, player_state_ref, broadcast_manager_ref, send_command_callback, scheduler,
+                 time_model=None, survival_ref=None):
         self.player_id = player_id
         self.player_state = player_state_ref
         self.broadcast_manager = broadcast_manager_ref
         self.send_command = send_command_callback
+        self.time_model = time_model if time_model is not None else TimeModel()
+        self.survival = survival_ref
+        self.scheduler = scheduler
+        self.state_timer = None
 
         self.state = ElevationState.IDLE
         self.current_ritual_initiator_pid = None
         self.current_ritual_level = 0
         self.participants = {}
 
-        self.state_start_time = time.time()
-        self.ritual_timeout = 60
-        self.general_cooldown_duration = 30
+        # Durations in server time units (Incantation itself takes 300)
+        self.ritual_timeout = 6000
+        self.general_cooldown_duration = 3000
+        self.arrival_delay = 500
+        self.server_response_timeout = 1500
         self.last_ritual_end_time = 0
 
-        self.last_look_before_incantation_str = None
+        self.last_look_before_incantation = None
         self.pending_actions = []
 
+    def _enter(self, state):
+        """Switch state and arm the timer bounding how long we may stay in it"""
+        self.state = state
+        if self.state_timer:
+            self.state_timer.cancel()
+            self.state_timer = None
+        
+        if state == ElevationState.JOINING:
+            units, callback = self.arrival_delay, self._on_arrival
+        elif state in (ElevationState.INITIATING, ElevationState.GATHERING_AT_SITE, ElevationState.PREPARING_RITUAL):
+            units, callback = self.ritual_timeout, self._on_ritual_timeout
+        elif state == ElevationState.AWAITING_SERVER_RESPONSE:
+            units, callback = self.server_response_timeout, self._on_server_timeout
+        elif state == ElevationState.COOLDOWN:
+            units, callback = self.general_cooldown_duration, self._on_cooldown_over
+        else:
+            return
+        self.state_timer = self.scheduler.call_later(self.time_model.seconds(units), callback)
+
+    def _on_ritual_timeout(self):
+        print(f"Ritual timeout in state {self.state}. Resetting.")
+        self.reset_ritual_state(success=False)
+
+    def _on_server_timeout(self):
+        print("Timeout waiting for server response to Incantation. Resetting.")
+        self.reset_ritual_state(success=False)
+
+    def _on_cooldown_over(self):
+        print("Cooldown finished.")
+        self._enter(ElevationState.IDLE)
+
+    def _on_arrival(self):
+        print(f"Arrived at ritual site (simulated) for L{self.current_ritual_level}. Setting stones.")
+        ready_msg = self.broadcast_manager.create_incantation_ready_broadcast()
+        self.pending_actions.append(f"Broadcast {ready_msg}")
+        self._enter(ElevationState.GATHERING_AT_SITE)
+        print(f"Sent READY for L{self.current_ritual_level}. Now in GATHERING_AT_SITE (as participant).")
+
     def reset_ritual_state(self, success=False):
         """Reset all ritual-related state variables"""
         print(f"Ritual reset. Success: {success}. Current state: {self.state}")
-        self.state = ElevationState.IDLE
         self.current_ritual_initiator_pid = None
         self.current_ritual_level = 0
         self.participants.clear()
-        self.last_look_before_incantation_str = None
+        self.last_look_before_incantation = None
         self.pending_actions.clear()
         self.last_ritual_end_time = time.time()
-        self.state_start_time = time.time()
-        if not success:
-             self.state = ElevationState.COOLDOWN
+        self._enter(ElevationState.IDLE if success else ElevationState.COOLDOWN)
 
     def _can_start_or_join_ritual(self):
         """Check if player is eligible to participate in rituals"""
         if self.player_state.level >= 8: return False
-        if time.time() - self.last_ritual_end_time < self.general_cooldown_duration:
+        if self.time_model.units_since(self.last_ritual_end_time) < self.general_cooldown_duration:
+            return False
+        if self.survival and not self.survival.can_afford(self.ritual_cost(self.player_state.level)):
             return False
         return True
 
+    def ritual_cost(self, level):
+        """Time units a ritual at this level is expected to take, gathering included"""
+        if level == 1:
+            return 7 + 300  # Look, Incantation
+        return self.arrival_delay + 4 * 7 + 300  # walk-in, broadcasts and Look, Incantation
+
     def handle_teammate_broadcast(self, bcast_data):
         """Process elevation-related broadcasts from other players"""
         msg_type = bcast_data.get("type")
@@ -305,10 +518,10 @@ class ElevationManager:
             return
 
         if self.state == ElevationState.IDLE and self._can_start_or_join_ritual():
-            if msg_type == "BCAST_INC_INIT" and level == self.player_state.level:
+            if msg_type == "INC_INIT" and level == self.player_state.level:
                 print(f"Received INC_INIT from {sender_pid} for our L{self.player_state.level}. Considering joining.")
                 if self.player_state.can_elevate(use_shared_inventory=False):
-                    self.state = ElevationState.JOINING
+                    self._enter(ElevationState.JOINING)
                     self.current_ritual_initiator_pid = sender_pid
                     self.current_ritual_level = level
                     self.participants[self.player_id] = {"status": "SELF_JOINING"}
@@ -319,17 +532,16 @@ class ElevationManager:
                     print(f"Don't have my personal share of stones for L{level}, won't join {sender_pid}'s ritual yet.")
 
         elif self.state == ElevationState.INITIATING and self.current_ritual_initiator_pid == self.player_id:
-            if msg_type == "BCAST_INC_JOIN" and bcast_data.get("init_pid") == self.player_id and level == self.current_ritual_level:
+            if msg_type == "INC_JOIN" and bcast_data.get("init_pid") == self.player_id and level == self.current_ritual_level:
                 print(f"Player {sender_pid} is JOINING our ritual for L{self.current_ritual_level}.")
                 self.participants[sender_pid] = {"status": "JOINED", "direction": bcast_data.get("direction")}
-                required_players = self.player_state.elevation_requirements[self.current_ritual_level]["players"]
+                required_players = self.player_state.requirements.players(self.current_ritual_level)
                 if len(self.participants) + 1 >= required_players:
                     print(f"Enough players ({len(self.participants) + 1}/{required_players}) joined. Moving to GATHERING_AT_SITE.")
-                    self.state = ElevationState.GATHERING_AT_SITE
-                    self.state_start_time = time.time()
+                    self._enter(ElevationState.GATHERING_AT_SITE)
 
         elif self.state == ElevationState.GATHERING_AT_SITE:
-            if msg_type == "BCAST_INC_READY" and level == self.current_ritual_level:
+            if msg_type == "INC_READY" and level == self.current_ritual_level:
                 if sender_pid == self.current_ritual_initiator_pid or sender_pid in self.participants:
                     print(f"Player {sender_pid} is READY for L{self.current_ritual_level} ritual.")
                     if sender_pid == self.current_ritual_initiator_pid:
@@ -340,54 +552,42 @@ class ElevationManager:
                     print(f"Received BCAST_INC_READY from {sender_pid} who is not part of current ritual for L{self.current_ritual_level}.")
 
         elif self.state == ElevationState.JOINING and self.current_ritual_initiator_pid == sender_pid:
-            if msg_type == "BCAST_INC_CONFIRM" and level == self.current_ritual_level:
+            if msg_type == "INC_CONFIRM" and level == self.current_ritual_level:
                 print(f"Initiator {sender_pid} confirmed ritual start for L{level}. Awaiting server.")
-                self.state = ElevationState.AWAITING_SERVER_RESPONSE
-                self.state_start_time = time.time()
+                self._enter(ElevationState.AWAITING_SERVER_RESPONSE)
 
     def update_and_get_command(self):
         """Main decision logic for elevation manager, returns commands to execute"""
+        # Timeouts, the cooldown and the simulated arrival are driven by the scheduler (see _enter)
         if self.state in [ElevationState.INITIATING, ElevationState.JOINING, ElevationState.GATHERING_AT_SITE, ElevationState.PREPARING_RITUAL]:
-            if time.time() - self.state_start_time > self.ritual_timeout:
-                print(f"Ritual timeout in state {self.state}. Resetting.")
+            if self.survival and not self.survival.can_afford(300):
+                print(f"Not enough food left to finish the ritual in state {self.state}. Abandoning.")
                 self.reset_ritual_state(success=False)
 
-        if self.state == ElevationState.COOLDOWN:
-            if time.time() - self.last_ritual_end_time >= self.general_cooldown_duration:
-                print("Cooldown finished.")
-                self.state = ElevationState.IDLE
-                self.state_start_time = time.time()
-
         if self.state == ElevationState.IDLE:
             if self._can_start_or_join_ritual():
                 if self.player_state.can_elevate(use_shared_inventory=True):
                     my_level = self.player_state.level
-                    requirements = self.player_state.elevation_requirements.get(my_level, {})
-                    required_players = requirements.get("players", 1)
+                    required_players = self.player_state.requirements.players(my_level)
 
-                    available_teammates_count = 0
-                    for pid, data in self.broadcast_manager.teammates.items():
-                        if pid != self.player_id and data.get('level') == my_level and \
-                           (time.time() - data.get('last_seen', 0)) < 30:
-                            available_teammates_count +=1
+                    available_teammates_count = self.broadcast_manager.teammates.live_count(my_level)
 
                     if my_level == 1 and self.player_state.can_elevate(use_shared_inventory=False):
                          print(f"Ready for SOLO elevation (L{my_level}→{my_level + 1})")
                          self.current_ritual_initiator_pid = self.player_id
                          self.current_ritual_level = my_level
                          self.participants[self.player_id] = {"status": "SELF_INITIATING"}
-                         self.state = ElevationState.PREPARING_RITUAL
-                         self.state_start_time = time.time()
+                         self._enter(ElevationState.PREPARING_RITUAL)
                          print(f"Transitioning to PREPARING_RITUAL (SOLO L1)")
                          self.pending_actions.append("Look")
 
                     elif available_teammates_count + 1 >= required_players:
-                        print(f"Potential to INITIATE for L{my_level}. Have {available_teammates_count+1}/{required_players} players. Team has stones.")
-                        self.state = ElevationState.INITIATING
+                        print(f"Potential to INITIATE for L{my_level}. Have {available_teammates_count+1}/{required_players} players. "
+                              f"Stones from {self.player_state.smallest_helping_group() or 'us alone'}.")
+                        self._enter(ElevationState.INITIATING)
                         self.current_ritual_initiator_pid = self.player_id
                         self.current_ritual_level = my_level
                         self.participants[self.player_id] = {"status": "SELF_INITIATING"}
-                        self.state_start_time = time.time()
                         init_msg = self.broadcast_manager.create_incantation_initiate_broadcast()
                         self.pending_actions.append(f"Broadcast {init_msg}")
                         print(f"Transitioning to INITIATING ritual for L{my_level}.")
@@ -395,19 +595,9 @@ class ElevationManager:
         elif self.state == ElevationState.INITIATING:
             pass
 
-        elif self.state == ElevationState.JOINING:
-            if time.time() - self.state_start_time > 5:
-                print(f"Arrived at ritual site (simulated) for L{self.current_ritual_level}. Setting stones.")
-                ready_msg = self.broadcast_manager.create_incantation_ready_broadcast()
-                self.pending_actions.append(f"Broadcast {ready_msg}")
-                self.state = ElevationState.GATHERING_AT_SITE
-                self.state_start_time = time.time()
-                print(f"Sent READY for L{self.current_ritual_level}. Now in GATHERING_AT_SITE (as participant).")
-
         elif self.state == ElevationState.GATHERING_AT_SITE:
             if self.current_ritual_initiator_pid == self.player_id:
-                requirements = self.player_state.elevation_requirements[self.current_ritual_level]
-                required_players = requirements["players"]
+                required_players = self.player_state.requirements.players(self.current_ritual_level)
 
                 ready_participants_count = 0
                 for pid, data in self.participants.items():
@@ -417,24 +607,22 @@ class ElevationManager:
 
                 if ready_participants_count >= required_players:
                     print(f"All {required_players} players ready for L{self.current_ritual_level}. Initiator moving to PREPARING_RITUAL.")
-                    self.state = ElevationState.PREPARING_RITUAL
-                    self.state_start_time = time.time()
+                    self._enter(ElevationState.PREPARING_RITUAL)
                     self.pending_actions.append("Look")
 
         elif self.state == ElevationState.PREPARING_RITUAL:
             if self.current_ritual_initiator_pid == self.player_id:
-                if self.last_look_before_incantation_str:
-                    print(f"Initiator has vision: {self.last_look_before_incantation_str[:50]}...")
-                    all_stones_present = self._check_stones_on_tile(self.last_look_before_incantation_str)
+                if self.last_look_before_incantation is not None:
+                    print(f"Initiator has vision: {self._describe_tile(self.last_look_before_incantation)}")
+                    all_stones_present = self._check_stones_on_tile(self.last_look_before_incantation)
 
                     if all_stones_present:
                         print(f"Stones verified on tile for L{self.current_ritual_level}. Starting Incantation!")
                         confirm_msg = self.broadcast_manager.create_incantation_confirm_broadcast()
                         self.pending_actions.append(f"Broadcast {confirm_msg}")
                         self.pending_actions.append("Incantation")
-                        self.state = ElevationState.AWAITING_SERVER_RESPONSE
-                        self.state_start_time = time.time()
-                        self.last_look_before_incantation_str = None
+                        self._enter(ElevationState.AWAITING_SERVER_RESPONSE)
+                        self.last_look_before_incantation = None
                     else:
                         print(f"Stones NOT correct on tile for L{self.current_ritual_level}! Resetting ritual.")
                         self.reset_ritual_state(success=False)
@@ -444,46 +632,35 @@ class ElevationManager:
                 print("ERROR: Participant in PREPARING_RITUAL state!")
                 self.reset_ritual_state(success=False)
 
-        elif self.state == ElevationState.AWAITING_SERVER_RESPONSE:
-            if time.time() - self.state_start_time > 15:
-                print("Timeout waiting for server response to Incantation. Resetting.")
-                self.reset_ritual_state(success=False)
-
         if self.pending_actions:
             actions_to_send = self.pending_actions.copy()
             self.pending_actions.clear()
             return actions_to_send[0] if len(actions_to_send) == 1 else actions_to_send
         return None
 
-    def _check_stones_on_tile(self, vision_tile_zero_str):
-        """Check if required stones are present on current tile for elevation"""
-        if vision_tile_zero_str is None: return False
+    def _describe_tile(self, tile_counts):
+        return " ".join(f"{name}x{count}" for name, count in zip(TILE_FIELDS, tile_counts) if count)
+
+    def _check_stones_on_tile(self, tile_counts):
+        """Check if enough of each required stone lies on the current tile for elevation"""
+        if tile_counts is None: return False
         
-        requirements = self.player_state.elevation_requirements.get(self.current_ritual_level, {})
+        requirements = self.player_state.requirements.stones(self.current_ritual_level)
         if not requirements: return False
 
-        tile_contents = vision_tile_zero_str.lower().split()
-
         for stone, needed_count in requirements.items():
-            if stone == "players" or needed_count == 0:
-                continue
-
-            if stone not in tile_contents and needed_count > 0:
-                 print(f"Stone check fail: Need {stone} (count {needed_count}), not found in '{vision_tile_zero_str}'")
+            on_tile = tile_counts[FIELD_INDEX[stone]]
+            if on_tile < needed_count:
+                 print(f"Stone check fail: Need {needed_count} {stone}, {on_tile} on tile")
                  return False
 
-        print(f"Stone check (simplified) PASSED for L{self.current_ritual_level} on tile '{vision_tile_zero_str}'")
+        print(f"Stone check PASSED for L{self.current_ritual_level} on tile '{self._describe_tile(tile_counts)}'")
         return True
 
-    def set_vision_for_incantation_check(self, vision_str):
-        """Store vision data for pre-incantation stone verification"""
+    def set_vision_for_incantation_check(self, vision_data):
+        """Store the current tile counts for pre-incantation stone verification"""
         if self.state == ElevationState.PREPARING_RITUAL and self.current_ritual_initiator_pid == self.player_id:
-            try:
-                tile0_content = vision_str.strip('[]').split(',', 1)[0].strip()
-                self.last_look_before_incantation_str = tile0_content
-            except Exception as e:
-                print(f"ERROR parsing vision for incantation check: {e}")
-                self.last_look_before_incantation_str = None
+            self.last_look_before_incantation = vision_data['current_tile']
 
     def handle_elevation_response(self, response):
         """Process server response to incantation command"""
@@ -492,7 +669,7 @@ class ElevationManager:
 
         if "Elevation underway" in response:
             print("Elevation in progress...")
-            self.state_start_time = time.time()
+            self._enter(ElevationState.AWAITING_SERVER_RESPONSE)
             return None
         elif "Current level:" in response:
             level_match = re.search(r'Current level: (\d+)', response)
@@ -501,23 +678,22 @@ class ElevationManager:
                 print(f"ELEVATION SUCCESS! Now level {new_level}")
                 self.player_state.level = new_level
                 self.reset_ritual_state(success=True)
-                self.state = ElevationState.COOLDOWN
-                self.last_ritual_end_time = time.time()
+                self._enter(ElevationState.COOLDOWN)
                 return new_level
         elif response == "ko":
             print("Elevation failed! (Server responded KO)")
             self.reset_ritual_state(success=False)
-            self.state = ElevationState.COOLDOWN
-            self.last_ritual_end_time = time.time()
 
         return None
 
 class ForkManager:
     """Manages team reproduction strategy through forking"""
     
-    def __init__(self):
-        self.last_fork_time = 0
-        self.fork_cooldown = 60
+    def __init__(self, scheduler, time_model=None):
+        self.time_model = time_model if time_model is not None else TimeModel()
+        self.scheduler = scheduler
+        self.fork_cooldown = 6000  # time units
+        self.cooldown_over = True  # set again by a timer fork_cooldown after each fork
         self.team_size_target = 6
         
     def should_fork(self, player_state, mode):
@@ -525,7 +701,7 @@ class ForkManager:
         if mode != "SAFE" or player_state.level < 2:
             return False
             
-        if time.time() - self.last_fork_time < self.fork_cooldown:
+        if not self.cooldown_over:
             return False
             
         if player_state.level >= 6:
@@ -539,108 +715,81 @@ class ForkManager:
     
     def attempt_fork(self):
         """Execute fork command and update internal state"""
-        self.last_fork_time = time.time()
+        self.cooldown_over = False
+        self.scheduler.call_later(self.time_model.seconds(self.fork_cooldown), self._on_cooldown_over)
         print("Forking to expand team!")
         return "Fork"
 
+    def _on_cooldown_over(self):
+        self.cooldown_over = True
+
 class FastVisionParser:
     """Efficiently parse vision data from server Look command"""
     
     def parse_vision(self, vision_string):
-        """Parse vision string and extract locations of resources and players"""
-        tiles = [tile.strip() for tile in vision_string.strip('[]').split(',')]
-        
-        food_locations = []
-        stone_locations = []
-        player_locations = []
-        
-        for i, tile_content in enumerate(tiles):
-            if not tile_content:
-                continue
-
-            if 'food' in tile_content:
-                food_locations.append(i)
-
-            for stone in ['linemate', 'deraumere', 'sibur', 'mendiane', 'phiras', 'thystame']:
-                if stone in tile_content:
-                    stone_locations.append((i, stone))
-
-            if 'player' in tile_content:
-                player_locations.append(i)
-        
+        """Parse vision string into per-tile counts and the locations of food and players"""
+        return self.from_counts(parse_look(vision_string))
+    
+    def from_counts(self, counts, synthetic=False):
+        """Vision data from a LookCounts, real or rebuilt from the world map"""
         return {
-            'tiles': tiles,
-            'food_locations': food_locations,
-            'stone_locations': stone_locations,
-            'player_locations': player_locations,
-            'current_tile': tiles[0] if tiles else ''
+            'synthetic': synthetic,
+            'counts': counts,
+            'food_locations': counts.locations("food"),
+            'player_locations': counts.locations("player"),
+            'current_tile': counts.tile(0)
         }
     
     def has_food_here(self, vision_data):
         """Check if food is present on current tile"""
         return 0 in vision_data['food_locations']
 
-class DirectMovement:
-    """Calculate movement commands to reach specific map tiles"""
-    
-    def get_action_for_food(self, food_locations):
-        """Get movement commands to reach closest food tile"""
-        if not food_locations:
-            return []
-        
-        target_tile_index = min(food_locations)
-        return self.get_actions_to_reach_tile(target_tile_index)
-
-    def get_actions_to_reach_tile(self, target_tile_index: int) -> list[str]:
-        """Calculate sequence of movement commands to reach specified tile index"""
-        if target_tile_index == 0:
-            return []
-
-        level = 0
-        start_index_of_level = 0
-        tiles_in_level = 1
-        while start_index_of_level + tiles_in_level <= target_tile_index:
-            start_index_of_level += tiles_in_level
-            level += 1
-            tiles_in_level = 2 * level + 1
-
-        if level == 0:
-             return []
-
-        actions = []
-
-        for _ in range(level):
-            actions.append("Forward")
-
-        position_in_level = target_tile_index - start_index_of_level
-        center_of_level = tiles_in_level // 2
-
-        if position_in_level < center_of_level:
-            actions.append("Left")
-            for _ in range(center_of_level - position_in_level):
-                actions.append("Forward")
-        elif position_in_level > center_of_level:
-            actions.append("Right")
-            for _ in range(position_in_level - center_of_level):
-                actions.append("Forward")
-
-        return actions
-
 class AdvancedAI:
     """Main AI controller with broadcast communication, elevation rituals, and team management"""
     
-    def __init__(self, config):
+    def __init__(self, config, loop=None, player_index=0):
         self.config = config; self.client = None; self.running = False
-        self.survival = SimpleSurvivalManager()
-        player_id = f"{getattr(config, 'team_name', 'p')}_{int(time.time()*1000)}"
-        self.player_state = PlayerState(player_id=player_id)
-        self.broadcast_manager = BroadcastManager(player_id=player_id, player_state_ref=self.player_state)
+        self.loop = loop if loop is not None else EventLoop(); self.player_index = player_index
+        self.owns_loop = loop is None
+        self.time_model = TimeModel()
+        self.survival = SimpleSurvivalManager(time_model=self.time_model)
+        # 8 hex digits: the id packed into compact team broadcasts
+        player_id = pid_hash(f"{config.name}_{int(time.time()*1000)}_{player_index}")
+        self.player_state = PlayerState(player_id=player_id, time_model=self.time_model)
+        self.broadcast_manager = BroadcastManager(player_id=player_id, player_state_ref=self.player_state, team=config.name,
+                                                  time_model=self.time_model, scheduler=self.loop)
         self.elevation_manager = ElevationManager(player_id=player_id, player_state_ref=self.player_state,
-                                                  broadcast_manager_ref=self.broadcast_manager, send_command_callback=self._send)
-        self.fork_manager = ForkManager()
-        self.vision = FastVisionParser(); self.movement = DirectMovement()
+                                                  broadcast_manager_ref=self.broadcast_manager, send_command_callback=self._send,
+                                                  time_model=self.time_model, survival_ref=self.survival,
+                                                  scheduler=self.loop)
+        self.fork_manager = ForkManager(time_model=self.time_model, scheduler=self.loop)
+        self.vision = FastVisionParser()
         self.last_vision = None; self.commands_sent = 0; self.start_time = time.time()
-        self.last_command = None; self.inventory_checks = 0; self.action_queue = []
+        self.last_command = None; self.action_queue = []
+        # Inventory is only asked for when the ledger may have drifted, and as a safety net
+        # every reconcile_interval time units (polling used to run every polling_interval),
+        # every polling_interval while f is uncertain and every reconcile_seconds at most
+        self.ledger = InventoryLedger(food_estimate=self.survival.predicted_food)
+        self.inventory_due = False; self.inventory_timer = None
+        self.reconcile_interval = 1260; self.polling_interval = 210; self.reconcile_seconds = 3.0
+        self.inventory_sent = 0; self.inventory_sent_at = time.time()
+        self.idle_timeout = 1.0  # seconds; timers and replies normally wake the loop first
+        self.timers_seen = 0         # loop.timers_fired at the last step
+        self.decisions = 0
+        self.stats_printed = False
+        self.decision_latencies = deque(maxlen=1000)  # seconds from a line's arrival to the decision
+        self.executor = None; self.world_map = None; self.planner = None; self.explorer = None
+        self.look_confidence = 0.8   # share of the cone the map must know before a Look is skipped
+        self.looks_sent = 0; self.looks_avoided = 0
+        
+        # Parsed broadcast type -> how it updates the sender's entry in broadcast_manager.teammates
+        self.teammate_updates = {
+            "INV_SHARE": self._note_level,
+            "INC_INIT": self._note_ritual_message,
+            "INC_JOIN": self._note_ritual_message,
+            "INC_READY": self._note_ritual_message,
+            "INC_CONFIRM": self._note_ritual_message,
+        }
         
     def run(self):
         """Main entry point for AI execution"""
@@ -662,28 +811,97 @@ class AdvancedAI:
         print(f"ADVANCED AI - Broadcast, Rituals & Forking")
         print(f"Connecting to {self.config.machine}:{self.config.port}...")
         
-        self.client = NetworkClient(self.config)
+        self.client = NetworkClient(self.config, loop=self.loop, time_model=self.time_model)
         if not self.client.connect():
             return False
+        world = self.client.get_world_info()
+        self.world_map = WorldMap(world['width'], world['height'], time_model=self.time_model)
+        self.planner = PathPlanner(world['width'], world['height'])
+        self.executor = PipelineExecutor(self.client, self._send, time_model=self.time_model)
+        self.explorer = FrontierExplorer(self.world_map, self.planner, time_model=self.time_model)
         
         print(f"Connected! Starting advanced gameplay...")
         self.running = True
         return True
     
+    def is_active(self):
+        """Check if the player is alive and still connected"""
+        return self.running and self.client is not None and self.client.is_connected()
+    
+    def start(self):
+        """Send the opening commands once connected"""
+        self._send_inventory()
+        self._send("Look")
+    
+    def _send_inventory(self):
+        """Ask for the real inventory and push the safety-net reconciliation back"""
+        self._send("Inventory")
+        self.inventory_sent += 1
+        self.inventory_sent_at = time.time()
+        self.inventory_due = False
+        if self.inventory_timer:
+            self.inventory_timer.cancel()
+        self._arm_inventory_timer()
+    
+    def _arm_inventory_timer(self):
+        # Checked every polling_interval so a revised estimate of f is picked up
+        delay = min(self.time_model.seconds(self.polling_interval), self.reconcile_seconds)
+        self.inventory_timer = self.loop.call_later(delay, self._on_inventory_due)
+    
+    def _inventory_overdue(self):
+        """Check if the safety-net Inventory is due; an estimate of f that is still
+        settling, or simply wrong, can't stretch the wait past reconcile_seconds"""
+        waited = time.time() - self.inventory_sent_at
+        if waited >= self.reconcile_seconds:
+            return True
+        interval = self.reconcile_interval if self.time_model.confident() else self.polling_interval
+        return self.time_model.units(waited) >= interval
+    
+    def _on_inventory_due(self):
+        if self._inventory_overdue():
+            self.inventory_due = True
+        else:
+            self._arm_inventory_timer()
+    
+    def step(self, reply_timeout=0):
+        """Run one decision cycle: handle everything that arrived, then act.
+        The decision only runs when a line arrived, a timer fired or nothing is in flight."""
+        arrived_at = self.client.take_arrival_time()
+        handled = self._process_responses(reply_timeout)
+        if not self.running:
+            return
+        
+        timer_fired = self.loop.timers_fired != self.timers_seen
+        self.timers_seen = self.loop.timers_fired
+        if not (handled or timer_fired or not self.client.has_in_flight()):
+            return
+        
+        self._execute_advanced_behavior()
+        self.decisions += 1
+        if arrived_at is not None:
+            self.decision_latencies.append(time.monotonic() - arrived_at)
+        
+        if self.commands_sent % 25 == 0 and self.commands_sent > 0:
+            self._status_update()
+    
+    def get_decision_stats(self):
+        """Decision count and reaction time (line arrival to decision) percentiles in ms"""
+        latencies = sorted(self.decision_latencies)
+        if not latencies:
+            return {"decisions": self.decisions, "p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+        return {"decisions": self.decisions,
+                "p50_ms": latencies[len(latencies) // 2] * 1000,
+                "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+                "max_ms": latencies[-1] * 1000}
+    
     def _main_loop(self):
         """Main game loop handling server communication and decision making"""
-        self._send("Inventory")
-        self._send("Look")
+        self.start()
         
-        while self.running and self.client.is_connected():
+        while self.is_active():
             try:
-                self._process_responses()
-                self._execute_advanced_behavior()
-                
-                if self.commands_sent % 25 == 0 and self.commands_sent > 0:
-                    self._status_update()
-                
-                time.sleep(0.08)
+                self.step()
+                self.client.poll(self.idle_timeout)
                 
             except Exception as e:
                 print(f"Loop error: {e}")
@@ -695,49 +913,65 @@ class AdvancedAI:
 
         em_command_or_commands = self.elevation_manager.update_and_get_command()
         if em_command_or_commands:
+            # Regular work still queued waits behind the ritual and the team broadcasts
+            self.client.defer_pending(CommandPriority.NORMAL)
             if isinstance(em_command_or_commands, list):
                 for cmd in em_command_or_commands:
-                    self._send(cmd)
+                    self._send(cmd, CommandPriority.RITUAL)
             else:
-                self._send(em_command_or_commands)
+                self._send(em_command_or_commands, CommandPriority.RITUAL)
             return
 
         if self.broadcast_manager.should_broadcast() and not (self.last_command and self.last_command.startswith("Broadcast")):
             inv_message = self.broadcast_manager.create_inventory_broadcast()
-            self._send(f"Broadcast {inv_message}")
+            self._send(f"Broadcast {inv_message}", CommandPriority.BACKGROUND)
             status_message = self.broadcast_manager.create_legacy_status_broadcast(mode)
-            self._send(f"Broadcast {status_message}")
-            self.broadcast_manager.last_broadcast = time.time()
+            self._send(f"Broadcast {status_message}", CommandPriority.BACKGROUND)
+            self.broadcast_manager.mark_broadcast_sent()
             return
         
         if self.fork_manager.should_fork(self.player_state, mode):
             command = self.fork_manager.attempt_fork()
-            self._send(command)
+            self._send(command, CommandPriority.BACKGROUND)
             return
         
-        if not self.last_vision:
-            self._send("Look")
+        if (self.inventory_due or self.ledger.drift or self.survival.needs_confirmation()) \
+                and not self.client.has_in_flight(("Inventory",)):
+            self._send_inventory()
+            return
+        
+        # The plan in progress ends with its own Look; decide again once that arrives
+        if self.executor.busy():
             return
         
-        if self.vision.has_food_here(self.last_vision):
-            if self.last_command != "Take food":
+        if not self.last_vision:
+            self.last_vision = self._synthetic_vision()
+            if not self.last_vision:
+                if not self._act_from_map(mode):
+                    self._send("Look")
+                return
+        
+        if self.vision.has_food_here(self.last_vision) and self.survival.wants_food_here():
+            if self.last_vision['synthetic'] or self.last_command != "Take food":
                 print(f"TAKE! ({mode})")
-                self._send("Take food")
+                # Take what lies here in one go; the first ko ends the run
+                food_here = min(self.last_vision['current_tile'][FIELD_INDEX["food"]], 3)
+                self._start_plan(["Take food"] * max(food_here, 1), CommandPriority.SURVIVAL)
                 return
         
-        other_food = [loc for loc in self.last_vision['food_locations'] if loc != 0]
-        if other_food:
-            action = self.movement.get_action_for_food(other_food)
-            if action:
-                target = min(other_food)
-                print(f"Planning to move to food at tile {target} via {action} ({mode})")
-                for cmd_step in action:
-                    self._send(cmd_step)
-                self.last_vision = None
+        if self.survival.wants_food_detour():
+            here = (self.world_map.x, self.world_map.y)
+            food = {(x, y): count for x, y, count in self.world_map.find("food") if (x, y) != here}
+            best = self.planner.nearest(here, self.world_map.orientation, list(food), value=food.get)
+            if best:
+                target, action = best
+                print(f"Planning to move to food at {target} via {action} ({mode})")
+                priority = CommandPriority.SURVIVAL if mode == "HUNGRY" else CommandPriority.NORMAL
+                self._start_plan(action + ["Take food"], priority)
                 return
         
         if mode == "SAFE" and self.last_vision and self.elevation_manager.state == ElevationState.IDLE:
-            current_tile_content = self.last_vision['current_tile']
+            current_tile_counts = self.last_vision['current_tile']
             
             team_missing_for_my_elevation = self.player_state.get_missing_stones(use_shared_inventory=True)
             
@@ -746,127 +980,253 @@ class AdvancedAI:
                 sorted_needed_stones = sorted(needed_counts.keys(), key=lambda x: (needed_counts[x], x), reverse=True)
 
                 for stone in sorted_needed_stones:
-                    if stone in current_tile_content:
+                    if current_tile_counts[FIELD_INDEX[stone]]:
                         print(f"Targeting {stone} (Team needs for my L{self.player_state.level+1}) on current tile.")
-                        self._send(f"Take {stone}")
-                        self.last_vision = None
+                        self._start_plan([f"Take {stone}"])
                         return
+                
+                if self._plan_stone_tour(sorted_needed_stones):
+                    return
 
             generic_stones = ['linemate', 'deraumere', 'sibur', 'mendiane', 'phiras', 'thystame']
             random.shuffle(generic_stones)
 
             for stone in generic_stones:
-                if stone in current_tile_content and self.player_state.shared_inventory.get(stone, 0) < 3:
+                if current_tile_counts[FIELD_INDEX[stone]] and self.player_state.shared_inventory.get(stone, 0) < 3:
                     if stone not in team_missing_for_my_elevation:
                         print(f"Opportunistically taking {stone} (Team shared: {self.player_state.shared_inventory.get(stone, 0)}).")
-                        self._send(f"Take {stone}")
-                        self.last_vision = None
+                        self._start_plan([f"Take {stone}"])
                         return
 
             for stone in generic_stones:
-                if stone in current_tile_content and self.player_state.inventory.get(stone, 0) == 0:
+                if current_tile_counts[FIELD_INDEX[stone]] and self.player_state.inventory.get(stone, 0) == 0:
                     if stone not in team_missing_for_my_elevation :
                         was_opportunistically_targeted = (stone in generic_stones and self.player_state.shared_inventory.get(stone, 0) < 3)
                         if not was_opportunistically_targeted:
                             print(f"Taking {stone} (I have 0, opportunistic fallback).")
-                            self._send(f"Take {stone}")
-                            self.last_vision = None
+                            self._start_plan([f"Take {stone}"])
                             return
         
-        if self.commands_sent - self.inventory_checks > 30:
-            self._send("Inventory")
-            self.inventory_checks = self.commands_sent
-            return
-        
         if mode == "SAFE":
             print(f"Explore (SAFE) - Level {self.player_state.level}")
         else:
             print(f"Food search (HUNGRY)")
         
-        self._send(random.choice(["Forward", "Right", "Left"]))
-        self.last_vision = None
+        self._start_plan(self.explorer.next_moves(self.player_state.level))
+    
+    def _act_from_map(self, mode):
+        """Serve a current-tile decision from the world map instead of a fresh Look.
+        Only done while nothing is outstanding, so the map pose is where the command runs."""
+        if self.world_map is None or self.client.outstanding_units() > 0:
+            return False
+        tile = self.world_map.current_tile()
+        if tile is None:
+            return False
+        
+        if tile[FIELD_INDEX["food"]] and self.survival.wants_food_here():
+            print(f"TAKE! ({mode}, from map)")
+            self._send("Take food", CommandPriority.SURVIVAL)
+            return True
+        
+        if mode == "SAFE" and self.elevation_manager.state == ElevationState.IDLE:
+            for stone in self.player_state.get_missing_stones(use_shared_inventory=True):
+                if tile[FIELD_INDEX[stone]]:
+                    print(f"Targeting {stone} on current tile (from map).")
+                    self._send(f"Take {stone}")
+                    return True
+        return False
+    
+    def _plan_stone_tour(self, stones, max_targets=4):
+        """Queue one plan visiting the nearest known tile of each needed stone and taking it"""
+        here = (self.world_map.x, self.world_map.y)
+        orientation = self.world_map.orientation
+        takes = {}
+        for stone in stones[:max_targets]:
+            tiles = [(x, y) for x, y, _ in self.world_map.find(stone)]
+            best = self.planner.nearest(here, orientation, tiles)
+            if best:
+                takes.setdefault(best[0], []).append(stone)
+        if not takes:
+            return False
+        
+        legs = self.planner.tour(here, orientation, list(takes))
+        units = sum(self.planner.cost(actions) for _, actions in legs)
+        units += STEP_COST * sum(len(found) for found in takes.values())
+        if not self.survival.can_afford(units):
+            return False
+        
+        print(f"Stone tour over {len(legs)} tiles for {sorted(set(stones[:max_targets]))} ({units} units)")
+        steps = []
+        for target, actions in legs:
+            steps += actions
+            steps += [f"Take {stone}" for stone in takes[target]]
+        self._start_plan(steps)
+        return True
     
-    def _send(self, command):
+    def _send(self, command, priority=CommandPriority.NORMAL, plan=None):
         """Send command to server and update internal counters"""
-        self.client.send_command(command)
-        self.commands_sent += 1
+        future = self.client.send_command(command, priority=priority, plan=plan)
+        # A deduplicated query rides on one already outstanding and costs nothing more
+        if future and not self.client.last_send_reused:
+            self.survival.record_command(self.time_model.cost(command))
+            self.commands_sent += 1
         self.last_command = command
+        return future
+    
+    def _start_plan(self, steps, priority=CommandPriority.NORMAL):
+        """Pipeline steps, replacing any plan still running. A Look follows them
+        unless the map will still know enough of the cone where they end."""
+        units = sum(self.time_model.cost(step) for step in steps)
+        confidence = self.world_map.cone_confidence(self.player_state.level, self.world_map.pose_after(steps),
+                                                    max_age=self.world_map.stale_after - units)
+        follow_up = None if confidence >= self.look_confidence else "Look"
+        self._note_rollback(self.executor.start(steps, priority, follow_up=follow_up))
+        self.last_vision = None
+        
+        if priority == CommandPriority.SURVIVAL and self.survival.get_mode() == "HUNGRY":
+            # Starving: regular work still queued would only delay the food
+            dropped = self.client.drop_pending(CommandPriority.NORMAL)
+            if dropped:
+                self.survival.record_cancelled(sum(self.time_model.cost(future.command) for future in dropped))
+                print(f"Dropped {len(dropped)} queued command(s) for food")
+    
+    def _synthetic_vision(self):
+        """Vision rebuilt from the world map when it knows enough of the cone, else None.
+        Only while no move, Take or Set is pending, so the map pose is our own."""
+        if self.client.has_in_flight(("Forward", "Right", "Left", "Take ", "Set ", "Incantation")):
+            return None
+        level = self.player_state.level
+        if self.world_map.cone_confidence(level) < self.look_confidence:
+            return None
+        self.looks_avoided += 1
+        return self.vision.from_counts(self.world_map.synthetic_look(level), synthetic=True)
+    
+    def _cancel_plan(self):
+        """Withdraw the not-yet-transmitted steps of the current plan"""
+        self._note_rollback(self.executor.rollback())
+    
+    def _note_rollback(self, rollback):
+        """Give back the time budget of steps that will never run"""
+        withdrawn, cancelled = rollback
+        self.survival.record_cancelled(sum(self.time_model.cost(future.command) for future in cancelled))
+        if withdrawn:
+            print(f"Rolled back {withdrawn} step(s) of a plan")
     
-    def _process_responses(self):
-        """Process incoming responses from server"""
-        for _ in range(3):
-            response = self.client.get_response(timeout=0.05)
-            if response:
-                self._handle_response(response)
+    def _process_responses(self, reply_timeout=0):
+        """Drain every queued reply and server event in the order they arrived
+        (an eject must hit the map before the turns answered after it).
+        Returns how many were handled."""
+        handled = 0
+        item = self.client.get_next(timeout=reply_timeout)
+        while item and self.running:
+            kind, payload = item
+            if kind == "reply":
+                self._handle_reply(payload)
             else:
-                break
+                self._handle_event(payload)
+            handled += 1
+            item = self.client.get_next(timeout=0)
+        return handled
     
-    def _handle_response(self, response):
-        """Handle specific server response messages"""
+    def _handle_reply(self, reply):
+        """Handle a server reply, knowing which command it answers"""
+        command = reply.command
+        response = reply.response
+        rollback = self.executor.on_reply(reply)
+        if rollback:
+            self._note_rollback(rollback)
+        snapshot = self.ledger.apply(command, response)
+        if snapshot:
+            self.player_state.update_from_inventory(snapshot)
+        
         if response == "ok":
-            if self.last_command == "Take food":
+            if command in ("Forward", "Right", "Left"):
+                self.world_map.apply_action(command)
+            elif command and command.startswith(("Take ", "Set ")):
+                action, resource = command.split(" ", 1)
+                self.world_map.adjust_current(resource, -1 if action == "Take" else 1)
+            
+            if command == "Take food":
                 self.survival.record_food_collected()
                 self.last_vision = None
         
         elif response == "ko":
-            if self.last_command == "Incantation":
+            if command and command.startswith("Take "):
+                self.world_map.clear_current(command.split(" ", 1)[1])
+            if command == "Incantation":
                 self.elevation_manager.handle_elevation_response(response)
-            elif self.last_command in ["Take food", "Forward", "Right", "Left"]:
+            elif command in ["Take food", "Forward", "Right", "Left"]:
                 self.last_vision = None
         
-        elif response == "dead":
+        elif response.startswith("Current level:"):
+            self.ledger.mark_drift()
+            new_level = self.elevation_manager.handle_elevation_response(response)
+            if new_level:
+                self.player_state.level = new_level
+        
+        elif response.startswith("["):
+            self._handle_data(response)
+    
+    def _handle_event(self, event):
+        """Handle unsolicited server messages (death, broadcasts, ejection, rituals)"""
+        if event == "dead":
             print("DIED!")
             self._final_stats()
             self.running = False
         
-        elif response.startswith("message"):
-            parts = response.split(", ", 1)
+        elif event.startswith("message"):
+            parts = event.split(", ", 1)
             if len(parts) == 2:
                 direction_str = parts[0].split()[1]
-                message_content = parts[1]
-
-                parsed_broadcast_data = self.broadcast_manager.parse_broadcast(direction_str, message_content)
-
-                if parsed_broadcast_data:
-                    sender_pid = parsed_broadcast_data.get("pid")
-                    if sender_pid:
-                        current_teammate_status = self.broadcast_manager.teammates.get(sender_pid, {})
-                        current_teammate_status['last_seen'] = time.time()
-                        current_teammate_status['direction'] = direction_str
-
-                        if parsed_broadcast_data['type'] == 'INV_SHARE':
-                            current_teammate_status['level'] = parsed_broadcast_data.get('level')
-                        elif parsed_broadcast_data['type'] == 'LEGACY_STATUS':
-                            current_teammate_status['level'] = parsed_broadcast_data.get('level')
-                            current_teammate_status['status_legacy'] = parsed_broadcast_data.get('status')
-
-                        if parsed_broadcast_data['type'].startswith('INC_'):
-                            current_teammate_status['last_inc_msg'] = parsed_broadcast_data['type']
-                            current_teammate_status['inc_level_target'] = parsed_broadcast_data.get('level') or parsed_broadcast_data.get('target_level')
-                            self.elevation_manager.handle_teammate_broadcast(parsed_broadcast_data)
-
-                        self.broadcast_manager.teammates[sender_pid] = current_teammate_status
-
-        elif "Elevation underway" in response or "Current level:" in response:
-            new_level = self.elevation_manager.handle_elevation_response(response)
+                parsed = self.broadcast_manager.parse_broadcast(direction_str, parts[1])
+                if parsed and parsed["pid"]:
+                    status = self.broadcast_manager.teammates.touch(parsed["pid"], direction_str)
+                    update = self.teammate_updates.get(parsed['type'])
+                    if update:
+                        update(status, parsed)
+
+        elif event.startswith("eject:"):
+            print(f"Ejected ({event})")
+            try:
+                self.world_map.apply_eject(int(event.split(":", 1)[1]))
+            except ValueError:
+                self.world_map.forget()
+            self._cancel_plan()
+            self.last_vision = None
+            self.ledger.mark_drift()
+        
+        elif "Elevation underway" in event or "Current level:" in event:
+            if "Current level:" in event:
+                self.ledger.mark_drift()
+            new_level = self.elevation_manager.handle_elevation_response(event)
             if new_level:
                 self.player_state.level = new_level
-        
-        elif response.startswith("["):
-            self._handle_data(response)
     
+    def _note_level(self, status, parsed):
+        self.broadcast_manager.teammates.set_level(parsed['pid'], parsed.get('level'))
+
+    def _note_ritual_message(self, status, parsed):
+        status['last_inc_msg'] = parsed['type']
+        status['inc_level_target'] = parsed.get('level') or parsed.get('target_level')
+        self.elevation_manager.handle_teammate_broadcast(parsed)
+
     def _handle_data(self, response):
         """Handle inventory and vision data responses from server"""
-        if re.search(r'food \d+', response):
-            self.survival.update_from_inventory(response)
-            self.player_state.update_from_inventory(response)
+        snapshot = parse_inventory(response)
+        if snapshot:
+            if self.ledger.reconcile(snapshot):
+                print("Inventory ledger had drifted; reconciled")
+            self.survival.update_from_inventory(snapshot, self.client.outstanding_units())
+            self.player_state.update_from_inventory(snapshot)
         else:
-            if self.elevation_manager.state == ElevationState.PREPARING_RITUAL and \
-               self.elevation_manager.current_ritual_initiator_pid == self.player_state.player_id:
-                self.elevation_manager.set_vision_for_incantation_check(response)
-
             vision_data = self.vision.parse_vision(response)
             self.last_vision = vision_data
+            self.looks_sent += 1
+            self.world_map.merge_look(vision_data['counts'])
+            
+            if self.elevation_manager.state == ElevationState.PREPARING_RITUAL and \
+               self.elevation_manager.current_ritual_initiator_pid == self.player_state.player_id:
+                self.elevation_manager.set_vision_for_incantation_check(vision_data)
             
             if vision_data['food_locations']:
                 if 0 in vision_data['food_locations']:
@@ -885,10 +1245,12 @@ class AdvancedAI:
         missing = self.player_state.get_missing_stones()
         can_elevate = "READY" if self.player_state.can_elevate() else f"Need: {','.join(missing[:2])}"
         
-        print(f"L{self.player_state.level} {mode}: {food_rate:.1f} food/min, {can_elevate}")
+        print(f"L{self.player_state.level} {mode}: {food_rate:.1f} food/min, {can_elevate}, f≈{self.time_model.frequency:.0f}, "
+              f"life {self.survival.remaining_units():.0f}u (budget {self.survival.non_food_budget():.0f}u)")
     
     def _final_stats(self):
         """Print final performance statistics"""
+        self.stats_printed = True
         runtime = time.time() - self.start_time
         food_rate = self.survival.food_collected / (runtime/60) if runtime > 0 else 0
         
@@ -897,19 +1259,123 @@ class AdvancedAI:
         print(f"Final Level: {self.player_state.level}")
         print(f"Food rate: {food_rate:.1f} food/min")
         print(f"Commands: {self.commands_sent}")
+        if self.explorer:
+            exploration = self.explorer.get_stats()
+            print(f"World map: {exploration['known'] * 100:.1f}% known and fresh, "
+                  f"{self.world_map.explored_fraction() * 100:.1f}% explored, "
+                  f"{exploration['revealed']} tiles revealed ({exploration['coverage_rate']:.1f} per 100 units), "
+                  f"{exploration['plans']} exploration plans ({exploration['frontier_routes']} to a distant frontier)")
+        savings = self.client.get_queue_savings()
+        window = self.client.get_window_stats()
+        print(f"Window ({window['profile']}): {window['window']} in flight, "
+              f"srtt {window['srtt']*1000:.1f}ms, queue delay {window['queue_delay']*1000:.1f}ms")
+        print(f"Queue savings: {savings['units_saved']} time units "
+              f"({savings['cancelled']} cancelled, {savings['deduplicated']} deduplicated)")
+        for lane, stats in self.client.get_lane_stats().items():
+            print(f"Lane {lane}: sent {stats['sent']}, dropped {stats['dropped']}, depth {stats['depth']}, "
+                  f"wait avg {stats['avg_wait']*1000:.0f}ms max {stats['max_wait']*1000:.0f}ms")
+        if self.owns_loop:
+            usage = process_usage()
+            print(f"Process: {usage['cpu']:.2f}s CPU, {usage['rss_mb']:.1f} MB peak RSS")
+        for msg_type, stats in self.broadcast_manager.get_dispatch_stats().items():
+            print(f"Broadcast {msg_type}: {stats['count']} handled, {stats['avg_us']:.1f}us avg")
+        print(f"Broadcasts: {self.broadcast_manager.dropped_stale} stale dropped, "
+              f"{self.broadcast_manager.rejected} rejected without parsing")
+        if self.executor:
+            pipeline = self.executor.get_stats()
+            print(f"Pipeline: utilisation {pipeline['utilisation'] * 100:.0f}% "
+                  f"({pipeline['busy_units']} of {pipeline['elapsed_units']:.0f} units busy, "
+                  f"{pipeline['commands_per_100_units']:.1f} commands/100 units), "
+                  f"{pipeline['plans']} plans, {pipeline['speculative']} speculative steps, "
+                  f"{pipeline['rollbacks']} rollbacks ({pipeline['rolled_back']} withdrawn, "
+                  f"{pipeline['overrun']} already sent)")
+        polls = int(self.time_model.units_since(self.start_time) // self.polling_interval) + 1
+        print(f"Inventory: {self.inventory_sent} sent, {max(0, polls - self.inventory_sent)} saved "
+              f"against polling every {self.polling_interval} units "
+              f"({self.ledger.applied} Take/Set folded in, {self.ledger.mismatches} drift corrections)")
+        print(f"Vision: {self.looks_sent} Look replies, {self.looks_avoided} Looks avoided "
+              f"by rebuilding the cone from the map")
+        decisions = self.get_decision_stats()
+        print(f"Decisions: {decisions['decisions']}, reaction p50 {decisions['p50_ms']:.1f}ms "
+              f"p95 {decisions['p95_ms']:.1f}ms max {decisions['max_ms']:.1f}ms")
+        teammates = self.broadcast_manager.teammates
+        print(f"Teammates: {len(teammates)} live, {teammates.expired} expired, {teammates.evicted} evicted")
         print(f"Stone inventory: {dict((k,v) for k,v in self.player_state.inventory.items() if k != 'food' and v > 0)}")
     
     def _cleanup(self):
         """Clean shutdown and resource cleanup"""
+        if self.client and not self.stats_printed:
+            self._final_stats()
         print("Shutting down advanced AI...")
         if self.client:
             self.client.disconnect()
+        if self.owns_loop:
+            self.loop.close()
+
+class MultiPlayerRunner:
+    """Runs several AdvancedAI players in one process, multiplexed over one event loop"""
+    
+    def __init__(self, config):
+        self.config = config
+        self.loop = EventLoop()
+        self.players = [AdvancedAI(config, loop=self.loop, player_index=i) for i in range(config.players)]
+        self.report_interval = 60
+        self.last_report = time.time()
+    
+    def run(self):
+        """Connect every player and drive them until all of them are gone"""
+        active = []
+        try:
+            for player in self.players:
+                if player._connect():
+                    player.start()
+                    active.append(player)
+                else:
+                    print(f"Player {player.player_index} could not join the game")
+            if not active:
+                return 84
+            
+            while active:
+                for player in list(active):
+                    if not player.is_active():
+                        active.remove(player)
+                        continue
+                    try:
+                        player.step()
+                    except Exception as e:
+                        print(f"Loop error (player {player.player_index}): {e}")
+                
+                self.loop.run_once(1.0)
+                
+                if time.time() - self.last_report > self.report_interval:
+                    self._report_usage()
+        except KeyboardInterrupt:
+            print("\nInterrupted")
+        finally:
+            self._report_usage()
+            for player in self.players:
+                player._cleanup()
+            self.loop.close()
+        return 0
+    
+    def _report_usage(self):
+        """Print CPU and memory per player, comparable with one process per player"""
+        self.last_report = time.time()
+        usage = process_usage()
+        count = len(self.players)
+        alive = sum(1 for player in self.players if player.is_active())
+        print(f"MULTI-PLAYER: {alive}/{count} alive, "
+              f"{usage['cpu'] / count:.2f}s CPU/player, {usage['rss_mb'] / count:.1f} MB RSS/player "
+              f"(process total {usage['cpu']:.2f}s, {usage['rss_mb']:.1f} MB)")
 
 class AIController:
-    """Compatibility wrapper for AdvancedAI"""
+    """Compatibility wrapper for AdvancedAI (or MultiPlayerRunner with -j)"""
     
     def __init__(self, config):
-        self.ai = AdvancedAI(config)
+        if getattr(config, "players", 1) > 1:
+            self.ai = MultiPlayerRunner(config)
+        else:
+            self.ai = AdvancedAI(config)
     
     def run(self):
         """Run the AI controller"""
@@ -44,32 +44,34 @@ from config import Config
 def helper(args):
     if len(args) == 2:
         if args[1] == "-help" or args[1] == "help":
-            print("USAGE: ./zappy_ai -p port -n name -h machine")
+            print("USAGE: ./zappy_ai -p port -n name -h machine [-j players]")
             print("")
             print("option     description")
             print("-p port    port number")
             print("-n name    name of the team")
             print("-h machine name of the machine; localhost by default")
+            print("-j players number of players run by this process; 1 by default")
             sys.exit(0)
 
 def flagChecker(args):
     if len(args) == 7 and args[1] == "-p" and args[3] == "-n" and args[5] == "-h":
         return 1
     # Also accept different orders (more flexible)
-    valid_flags = ["-p", "-n", "-h"]
+    valid_flags = ["-p", "-n", "-h", "-j"]
     flags_found = []
     for i in range(1, len(args), 2):
         if i < len(args) and args[i] in valid_flags:
             flags_found.append(args[i])
     
-    if len(set(flags_found)) == 3 and len(args) == 7:  # All 3 unique flags present
+    required_found = {"-p", "-n", "-h"}.issubset(flags_found)
+    if required_found and len(set(flags_found)) == len(flags_found) == (len(args) - 1) // 2:
         return 1
     return 0
 
 def inputCleaner(args):
-    if len(args) != 7:
+    if len(args) not in (7, 9):
         print("Error: Invalid number of arguments.")
-        print("Usage: ./zappy_ai -p port -n name -h machine")
+        print("Usage: ./zappy_ai -p port -n name -h machine [-j players]")
         sys.exit(84)
     
     if flagChecker(args) != 1:
@@ -80,6 +82,7 @@ def inputCleaner(args):
     port = None
     name = None
     machine = None
+    players = 1
     
     for i in range(1, len(args), 2):
         if i + 1 < len(args):
@@ -96,9 +99,18 @@ def inputCleaner(args):
                 name = value
             elif flag == "-h":
                 machine = value if value.lower() != "localhost" else "127.0.0.1"
+            elif flag == "-j":
+                try:
+                    players = int(value)
+                except ValueError:
+                    print("Error: Number of players must be an integer.")
+                    sys.exit(84)
+                if players < 1:
+                    print("Error: Number of players must be at least 1.")
+                    sys.exit(84)
     
     if port is None or name is None or machine is None:
         print("Error: Missing required arguments")
         sys.exit(84)
     
-    return Config(port=port, name=name, machine=machine)
\ No newline at end of file
+    return Config(port=port, name=name, machine=machine, players=players)
\ No newline at end of file
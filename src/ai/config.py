@@ -1,5 +1,10 @@
 class Config:
-    def __init__(self, port: int, name: str, machine: str = "127.0.0.1"):
+    def __init__(self, port: int, name: str, machine: str = "127.0.0.1", players: int = 1,
+                 window_profile: str = "throughput"):
         self.port = port
         self.name = name
         self.machine = machine
+        self.players = players
+        # "throughput" keeps the 10-command window full, "latency" keeps it short
+        # so reactive commands do not wait behind committed actions
+        self.window_profile = window_profile
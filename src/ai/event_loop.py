@@ -0,0 +1,98 @@
+import heapq
+import selectors
+import time
+from itertools import count
+
+class Timer:
+    """Handle of a scheduled callback; cancel() stops it from firing"""
+
+    __slots__ = ("when", "callback", "cancelled")
+
+    def __init__(self, when, callback):
+        self.when = when
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+class EventLoop:
+    """Single-threaded I/O multiplexer built on selectors (one per process).
+    Also runs timers: a heap of monotonic deadlines that bounds each select()."""
+
+    def __init__(self):
+        self.selector = selectors.DefaultSelector()
+        self.timers = []             # heap of (when, sequence, Timer)
+        self.sequence = count()
+        self.timers_fired = 0        # total, so callers can tell whether a timer ran since they last looked
+
+    def register(self, sock, events, callback):
+        """Watch a socket; callback(mask) is invoked when it becomes ready"""
+        self.selector.register(sock, events, callback)
+
+    def modify(self, sock, events, callback):
+        """Change the events watched on an already registered socket"""
+        self.selector.modify(sock, events, callback)
+
+    def unregister(self, sock):
+        """Stop watching a socket (ignored if it was never registered)"""
+        try:
+            self.selector.unregister(sock)
+        except (KeyError, ValueError):
+            pass
+
+    def has_sources(self):
+        """Check if at least one socket is being watched"""
+        return bool(self.selector.get_map())
+
+    def call_at(self, when, callback):
+        """Run callback() once time.monotonic() reaches when"""
+        timer = Timer(when, callback)
+        heapq.heappush(self.timers, (when, next(self.sequence), timer))
+        return timer
+
+    def call_later(self, delay, callback):
+        """Run callback() after delay seconds"""
+        return self.call_at(time.monotonic() + delay, callback)
+
+    def next_deadline(self):
+        """Monotonic time of the earliest live timer, or None"""
+        while self.timers and self.timers[0][2].cancelled:
+            heapq.heappop(self.timers)
+        return self.timers[0][0] if self.timers else None
+
+    def run_timers(self):
+        """Fire every timer that is due. Returns how many fired."""
+        now = time.monotonic()
+        fired = 0
+        while self.timers and self.timers[0][0] <= now:
+            _, _, timer = heapq.heappop(self.timers)
+            if not timer.cancelled:
+                timer.cancelled = True
+                timer.callback()
+                fired += 1
+        self.timers_fired += fired
+        return fired
+
+    def run_once(self, timeout=None):
+        """Block until a socket is ready, a timer is due or timeout expires, then dispatch.
+        Returns the number of socket callbacks and timers dispatched."""
+        deadline = self.next_deadline()
+        if deadline is not None:
+            wait = max(0.0, deadline - time.monotonic())
+            timeout = wait if timeout is None else min(timeout, wait)
+
+        dispatched = 0
+        if not self.has_sources():
+            if timeout:
+                time.sleep(timeout)
+        else:
+            events = self.selector.select(timeout)
+            for key, mask in events:
+                key.data(mask)
+            dispatched = len(events)
+        return dispatched + self.run_timers()
+
+    def close(self):
+        """Release the underlying selector"""
+        self.selector.close()
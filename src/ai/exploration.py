@@ -0,0 +1,100 @@
+from itertools import product
+from time_model import command_cost
+
+LOOK_COST = command_cost("Look")
+MOVES = ("Forward", "Right", "Left")
+
+# A tile never seen is worth this many tiles seen once but no longer explored
+NEVER_SEEN_WEIGHT = 4
+
+def _worth_trying(actions):
+    """Drop sequences that undo themselves: opposite turns back to back, or three turns in a row"""
+    for first, second in zip(actions, actions[1:]):
+        if {first, second} == {"Right", "Left"}:
+            return False
+    return all("Forward" in actions[i:i + 3] for i in range(len(actions) - 2))
+
+class FrontierExplorer:
+    """Exploration moves that reveal the most unexplored tiles per time unit.
+
+    Every sequence of up to depth moves is scored by the tiles the Look
+    closing it would reveal (the cone of our level at the end pose, from
+    WorldMap.cone_tiles) over its cost, that Look included. A tile counts
+    if it was not observed within the map's explored_after horizon, much
+    longer than the resource freshness window, and a tile never seen at all
+    counts NEVER_SEEN_WEIGHT times. When no such sequence reveals anything,
+    the route to the nearest unexplored tile of the torus (never-seen ones
+    first) is taken instead. Coverage is measured as the tiles Looks
+    revealed (WorldMap.revealed) per 100 time units.
+    """
+
+    def __init__(self, world_map, planner, time_model=None, depth=3):
+        self.world_map = world_map
+        self.planner = planner
+        self.time_model = time_model if time_model is not None else world_map.time_model
+        self.sequences = [list(actions) for length in range(1, depth + 1)
+                          for actions in product(MOVES, repeat=length) if _worth_trying(actions)]
+        self.started = self.time_model.now()
+        self.plans = 0
+        self.frontier_routes = 0   # plans heading for a distant unknown tile
+        self.expected_gain = 0     # tiles the chosen plans were expected to reveal
+
+    def _cutoff(self, units):
+        """seen_at below which a tile will no longer be explored once units have passed"""
+        return self.time_model.now() + self.time_model.seconds(units) - self.time_model.seconds(self.world_map.explored_after)
+
+    def gain(self, level, pose, cutoff):
+        """Weighted count of the distinct tiles a Look from pose would reveal"""
+        seen_at = self.world_map.seen_at
+        tiles = {tile for tile in self.world_map.cone_tiles(level, pose) if seen_at[tile] < cutoff}
+        return sum(1 if seen_at[tile] else NEVER_SEEN_WEIGHT for tile in tiles)
+
+    def nearest_frontier(self, cutoff):
+        """Closest (x, y) on the torus never seen, else closest unexplored one;
+        None if the whole map is explored"""
+        world = self.world_map
+        best = None
+        for tile, seen in enumerate(world.seen_at):
+            if seen >= cutoff:
+                continue
+            dx = abs(tile % world.width - world.x)
+            dy = abs(tile // world.width - world.y)
+            rank = (seen > 0, min(dx, world.width - dx) + min(dy, world.height - dy))
+            if best is None or rank < best[0]:
+                best = (rank, (tile % world.width, tile // world.width))
+        return best and best[1]
+
+    def next_moves(self, level):
+        """Moves to make before the next Look (never empty)"""
+        world = self.world_map
+        best = None
+        for actions in self.sequences:
+            units = sum(map(command_cost, actions)) + LOOK_COST
+            gain = self.gain(level, world.pose_after(actions), self._cutoff(units))
+            if gain and (best is None or gain / units > best[0]):
+                best = (gain / units, gain, actions)
+
+        if best is None:
+            target = self.nearest_frontier(self._cutoff(0))
+            if target is None:
+                return ["Forward"]
+            actions, _ = self.planner.route((world.x, world.y), world.orientation, target)
+            if not actions:
+                return ["Forward"]
+            self.frontier_routes += 1
+            units = sum(map(command_cost, actions)) + LOOK_COST
+            best = (0.0, self.gain(level, world.pose_after(actions), self._cutoff(units)), actions)
+
+        self.plans += 1
+        self.expected_gain += best[1]
+        return best[2]
+
+    def coverage_rate(self):
+        """Tiles revealed per 100 time units since the explorer was created"""
+        elapsed = self.time_model.units_since(self.started)
+        return 100 * self.world_map.revealed / elapsed if elapsed > 0 else 0.0
+
+    def get_stats(self):
+        return {"coverage_rate": self.coverage_rate(), "revealed": self.world_map.revealed,
+                "known": self.world_map.known_fraction(), "plans": self.plans,
+                "frontier_routes": self.frontier_routes, "expected_gain": self.expected_gain}
@@ -0,0 +1,125 @@
+from itertools import product
+from time_model import command_cost
+from vision_geometry import EAST, WEST, NORTH, SOUTH
+
+# Forward, Right and Left all cost 7/f, so a route's cost is its length in actions
+STEP_COST = command_cost("Forward")
+
+def wrap_options(start, target, size):
+    """Signed displacements reaching target on a ring of the given size (both ways round)"""
+    delta = (target - start) % size
+    if delta == 0:
+        return [0]
+    return [delta, delta - size]
+
+def turn_actions(orientation, facing):
+    """Cheapest turns from one orientation to another"""
+    diff = (facing - orientation) % 4
+    return [[], ["Right"], ["Right", "Right"], ["Left"]][diff]
+
+class PathPlanner:
+    """Turn-aware shortest paths on the torus.
+
+    Candidate routes go either way round each axis and walk the x or the y leg
+    first; the cheapest one counting turns as well as forwards is kept.
+    Positions are world coordinates of a WorldMap, orientations its NORTH..WEST.
+    """
+
+    def __init__(self, width, height):
+        self.width = max(1, width)
+        self.height = max(1, height)
+
+    def route(self, start, orientation, target):
+        """Cheapest (actions, final_orientation) from start facing orientation to target"""
+        best = None
+        dxs = wrap_options(start[0], target[0], self.width)
+        dys = wrap_options(start[1], target[1], self.height)
+        for dx, dy in product(dxs, dys):
+            x_leg = (EAST if dx > 0 else WEST, abs(dx))
+            y_leg = (SOUTH if dy > 0 else NORTH, abs(dy))
+            for legs in ((x_leg, y_leg), (y_leg, x_leg)):
+                actions = []
+                facing = orientation
+                for direction, distance in legs:
+                    if distance:
+                        actions += turn_actions(facing, direction)
+                        actions += ["Forward"] * distance
+                        facing = direction
+                if best is None or len(actions) < len(best[0]):
+                    best = (actions, facing)
+        return best
+
+    def cost(self, actions):
+        """Time units needed to perform a route"""
+        return len(actions) * STEP_COST
+
+    def nearest(self, start, orientation, targets, value=None):
+        """Pick the target with the cheapest route, or the best value per time unit.
+
+        targets is a list of (x, y) positions; value(target), if given, weighs them.
+        Returns (target, actions) or None when there are no targets.
+        """
+        best = None
+        for target in targets:
+            actions, _ = self.route(start, orientation, target)
+            units = self.cost(actions) + STEP_COST   # arriving is worth nothing without the Take
+            score = units / value(target) if value else units
+            if best is None or score < best[0]:
+                best = (score, target, actions)
+        return best and (best[1], best[2])
+
+    def tour(self, start, orientation, targets, max_exact=6):
+        """Order in which to visit several targets, as a list of (target, actions) legs.
+
+        Up to max_exact targets are ordered exactly (Held-Karp over visited subsets,
+        tracking the arrival orientation); larger sets use nearest-neighbour.
+        """
+        targets = list(targets)
+        if len(targets) <= max_exact:
+            return self._exact_tour(start, orientation, targets)
+        return self._greedy_tour(start, orientation, targets)
+
+    def _greedy_tour(self, start, orientation, targets):
+        legs = []
+        remaining = list(targets)
+        while remaining:
+            target, actions = self.nearest(start, orientation, remaining)
+            remaining.remove(target)
+            legs.append((target, actions))
+            _, orientation = self.route(start, orientation, target)
+            start = target
+        return legs
+
+    def _exact_tour(self, start, orientation, targets):
+        if not targets:
+            return []
+        # state (visited mask, last target, orientation) -> (cost, previous state, actions)
+        states = {}
+        for i, target in enumerate(targets):
+            actions, facing = self.route(start, orientation, target)
+            key = (1 << i, i, facing)
+            if key not in states or len(actions) < states[key][0]:
+                states[key] = (len(actions), None, actions)
+
+        for mask in range(1, 1 << len(targets)):
+            for key in [k for k in states if k[0] == mask]:
+                cost, _, _ = states[key]
+                _, last, facing = key
+                for j, target in enumerate(targets):
+                    if mask & (1 << j):
+                        continue
+                    actions, arrival = self.route(targets[last], facing, target)
+                    next_key = (mask | (1 << j), j, arrival)
+                    total = cost + len(actions)
+                    if next_key not in states or total < states[next_key][0]:
+                        states[next_key] = (total, key, actions)
+
+        full = (1 << len(targets)) - 1
+        key = min((k for k in states if k[0] == full), key=lambda k: states[k][0])
+        legs = []
+        while key is not None:
+            _, previous, actions = states[key]
+            legs.append((targets[key[1]], actions))
+            key = previous
+        legs.reverse()
+        return legs
@@ -1,70 +1,445 @@
 import socket
-import threading
-import queue
+import selectors
 import time
 from collections import deque
+from enum import IntEnum
+from itertools import count
+from event_loop import EventLoop
+from time_model import TimeModel, command_cost
+
+# Lines the server pushes without a matching request
+EVENT_PREFIXES = ("message ", "eject:", "Elevation underway")
+
+# Queries whose answer only changes when we act: a second copy queued before
+# any other command would get the same answer
+IDEMPOTENT_QUERIES = ("Look", "Inventory", "Connect_nbr")
+
+class CommandPriority(IntEnum):
+    """Send lanes, highest priority first: free window slots go to lower values"""
+    SURVIVAL = 0
+    RITUAL = 1
+    NORMAL = 2
+    BACKGROUND = 3
+
+class CommandFuture:
+    """Reply slot for one command: resolved with the server line answering it"""
+    __slots__ = ("command", "priority", "plan", "queued_at", "sent_at", "replied_at", "response",
+                 "cancelled", "callbacks", "arrival")
+
+    def __init__(self, command, priority=CommandPriority.NORMAL, plan=None):
+        self.command = command
+        self.priority = priority
+        self.plan = plan
+        self.queued_at = time.monotonic()
+        self.sent_at = None
+        self.replied_at = None
+        self.response = None
+        self.cancelled = False
+        self.callbacks = []
+        self.arrival = None       # Position of the reply among all received lines
+
+    def done(self):
+        """Check if the reply has arrived"""
+        return self.replied_at is not None
+
+    def result(self):
+        """Reply line, or None while still outstanding"""
+        return self.response
+
+    def round_trip_time(self):
+        """Seconds between writing the command and receiving its reply"""
+        if self.sent_at is None or self.replied_at is None:
+            return None
+        return self.replied_at - self.sent_at
+
+    def add_done_callback(self, callback):
+        """Call callback(future) once resolved (immediately if already done)"""
+        if self.done():
+            callback(self)
+        else:
+            self.callbacks.append(callback)
+
+    def cancel(self):
+        """Mark a never-sent command as dropped and notify its callbacks"""
+        self.cancelled = True
+        self.resolve(None)
+
+    def resolve(self, response, now=None):
+        """Record the reply and run the registered callbacks"""
+        self.response = response
+        self.replied_at = now if now is not None else time.monotonic()
+        callbacks, self.callbacks = self.callbacks, []
+        for callback in callbacks:
+            callback(self)
+
+# AIMD parameters per window profile. delay_budget is the queueing delay
+# tolerated before shrinking, in multiples of one uncongested 7/f action.
+WINDOW_PROFILES = {
+    "throughput": {"initial": 10, "delay_budget": 9.0, "decrease": 0.75},
+    "latency": {"initial": 2, "delay_budget": 1.0, "decrease": 0.5},
+}
+
+class WindowController:
+    """Tunes the number of commands kept in flight (1..max_window) from measured RTTs.
+
+    The uncongested RTT of each command cost class is tracked as a slowly aging
+    minimum; the excess of a sample over it is the time the command spent queued
+    behind earlier ones on the server. Below the profile's delay budget the
+    window grows by one per window of replies, above it it is cut
+    multiplicatively (at most once per round trip).
+    """
+
+    def __init__(self, profile="throughput", max_window=10):
+        if profile not in WINDOW_PROFILES:
+            raise ValueError(f"Unknown window profile '{profile}'")
+        params = WINDOW_PROFILES[profile]
+        self.profile = profile
+        self.max_window = max_window
+        self.window = float(min(params["initial"], max_window))
+        self.delay_budget = params["delay_budget"]
+        self.decrease = params["decrease"]
+        self.base_rtt = {}        # command cost -> uncongested RTT estimate
+        self.srtt = None          # Smoothed RTT over every command
+        self.queue_delay = 0.0    # Smoothed time spent behind earlier commands
+        self.last_decrease = 0.0
+        self.samples = 0
+
+    def size(self):
+        """Current effective window"""
+        return max(1, min(self.max_window, int(self.window)))
+
+    def _action_rtt(self):
+        """Uncongested RTT of a standard 7/f action, or the best stand-in known"""
+        if 7 in self.base_rtt:
+            return self.base_rtt[7]
+        return max(self.base_rtt.values()) if self.base_rtt else None
+
+    def on_reply(self, future):
+        """Feed one measured round trip into the controller"""
+        rtt = future.round_trip_time()
+        if rtt is None:
+            return
+        cost = command_cost(future.command) if future.command else 0
+        self.samples += 1
+        self.srtt = rtt if self.srtt is None else 0.875 * self.srtt + 0.125 * rtt
+
+        base = self.base_rtt.get(cost)
+        if base is None or rtt < base:
+            base = rtt
+        else:
+            base += (rtt - base) * 0.01  # Let the floor follow lasting latency changes
+        self.base_rtt[cost] = base
+
+        delay = rtt - base
+        self.queue_delay = 0.875 * self.queue_delay + 0.125 * delay
+        budget = self.delay_budget * (self._action_rtt() or rtt)
+
+        if delay > budget:
+            if future.replied_at - self.last_decrease > (self.srtt or rtt):
+                self.window = max(1.0, self.window * self.decrease)
+                self.last_decrease = future.replied_at
+        else:
+            self.window = min(float(self.max_window), self.window + 1.0 / self.window)
+
+    def get_stats(self):
+        """Window size and RTT figures for reporting"""
+        return {"profile": self.profile, "window": self.size(), "srtt": self.srtt or 0.0,
+                "queue_delay": self.queue_delay, "action_rtt": self._action_rtt() or 0.0,
+                "samples": self.samples}
+
+class LaneStats:
+    """Counters for one priority lane"""
+    __slots__ = ("sent", "dropped", "total_wait", "max_wait")
+
+    def __init__(self):
+        self.sent = 0
+        self.dropped = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
 
 class CommandBuffer:
-    def __init__(self, max_size=10):
-        self.max_size = max_size
-        self.pending_commands = deque()  # Commands waiting to be sent
-        self.sent_commands = deque()     # Commands sent but waiting for response
-        self.responses = queue.Queue()   # Received responses
-        self.lock = threading.RLock()     # Thread safety
+    def __init__(self, max_size=10, window=None, estimator=None):
+        self.max_size = max_size         # Server hard cap on unanswered commands
+        self.window = window             # Optional WindowController below that cap
+        self.estimator = estimator       # Optional FrequencyEstimator fed with reply timing
+        self.lanes = [deque() for _ in CommandPriority]       # Futures waiting to be sent, per priority
+        self.lane_stats = [LaneStats() for _ in CommandPriority]
+        self.sent_commands = deque()     # Futures sent but waiting for response
+        self.responses = deque()         # Resolved futures nobody subscribed to
+        self.events = deque()            # (arrival, line) of unsolicited server lines
+        self.arrivals = count()          # Stamps replies and events so their order can be restored
+        
+        # Plan tokens and query deduplication
+        self.next_plan = 1
+        self.mutations = 0               # Non-query commands queued so far
+        self.open_queries = {}           # query -> (future, mutations when queued)
+        self.units_saved = 0             # Server time units never spent thanks to cancel/dedup
+        self.deduplicated = 0
+        self.cancelled = 0
+        self.last_reused = False         # Whether the last add_command returned an existing future
     
     def can_send_command(self):
-        """Check if we can send another command (max 10 pending)"""
-        with self.lock:
-            return len(self.sent_commands) < self.max_size
+        """Check if we can send another command (max 10 pending, or the adaptive window)"""
+        limit = self.window.size() if self.window else self.max_size
+        return len(self.sent_commands) < min(limit, self.max_size)
+    
+    def has_pending(self):
+        """Check if any lane still holds unsent commands"""
+        return any(self.lanes)
     
-    def add_command(self, command):
-        """Add command to pending queue"""
-        with self.lock:
-            self.pending_commands.append(command)
+    def free_slots(self):
+        """Commands that could be queued now and still be transmitted right away"""
+        limit = min(self.window.size() if self.window else self.max_size, self.max_size)
+        return max(0, limit - len(self.sent_commands) - sum(map(len, self.lanes)))
+    
+    def new_plan(self):
+        """Token grouping the commands of one multi-step plan"""
+        token = self.next_plan
+        self.next_plan += 1
+        return token
+    
+    def add_command(self, command, callback=None, priority=CommandPriority.NORMAL, plan=None):
+        """Add command to its priority lane and return its future.
+
+        A query already outstanding with no other command queued since then is
+        not queued again: the existing future is returned instead, and
+        last_reused is set.
+        """
+        self.last_reused = False
+        if command in IDEMPOTENT_QUERIES:
+            open_query = self.open_queries.get(command)
+            if open_query and open_query[1] == self.mutations and not open_query[0].done():
+                future = open_query[0]
+                self.last_reused = True
+                self.deduplicated += 1
+                self.units_saved += command_cost(command)
+                if callback:
+                    future.add_done_callback(callback)
+                return future
+        else:
+            self.mutations += 1
+        
+        future = CommandFuture(command, priority, plan)
+        if callback:
+            future.add_done_callback(callback)
+        if command in IDEMPOTENT_QUERIES:
+            self.open_queries[command] = (future, self.mutations)
+        self.lanes[priority].append(future)
+        return future
     
     def get_next_command(self):
-        """Get next command to send"""
-        with self.lock:
-            # New logs
-            if self.pending_commands and self.can_send_command():
-                command = self.pending_commands.popleft()
-                self.sent_commands.append(command)
-                return command
-            # New log
+        """Get next future to send (highest priority lane first), or None if
+        every lane is empty or the window is full"""
+        if not self.can_send_command():
             return None
+        for priority, lane in enumerate(self.lanes):
+            if lane:
+                future = lane.popleft()
+                future.sent_at = time.monotonic()
+                self.sent_commands.append(future)
+                
+                stats = self.lane_stats[priority]
+                wait = future.sent_at - future.queued_at
+                stats.sent += 1
+                stats.total_wait += wait
+                stats.max_wait = max(stats.max_wait, wait)
+                return future
+        return None
+    
+    def _discard(self, future):
+        """Cancel a future that never reached the wire"""
+        self.cancelled += 1
+        self.units_saved += command_cost(future.command)
+        self.lane_stats[future.priority].dropped += 1
+        future.cancel()
+    
+    def drop_pending(self, priority):
+        """Discard every unsent command of one lane. Returns the dropped futures."""
+        lane = self.lanes[priority]
+        dropped = list(lane)
+        lane.clear()
+        for future in dropped:
+            self._discard(future)
+        return dropped
+    
+    def cancel_plan(self, plan):
+        """Discard the unsent commands of a plan; those already sent still run.
+        Returns the cancelled futures."""
+        cancelled = []
+        for lane in self.lanes:
+            kept = deque()
+            for future in lane:
+                if future.plan == plan:
+                    cancelled.append(future)
+                else:
+                    kept.append(future)
+            if len(kept) != len(lane):
+                lane.clear()
+                lane.extend(kept)
+        for future in cancelled:
+            self._discard(future)
+        return cancelled
+    
+    def defer_pending(self, priority):
+        """Move every unsent command of one lane behind the background lane"""
+        lane = self.lanes[priority]
+        background = self.lanes[CommandPriority.BACKGROUND]
+        while lane and priority != CommandPriority.BACKGROUND:
+            future = lane.popleft()
+            future.priority = CommandPriority.BACKGROUND
+            background.append(future)
+    
+    def outstanding_units(self):
+        """Time units of every command queued or in flight"""
+        units = sum(command_cost(future.command) for future in self.sent_commands if future.command)
+        for lane in self.lanes:
+            units += sum(command_cost(future.command) for future in lane)
+        return units
+    
+    def get_queue_savings(self):
+        """Commands cancelled or deduplicated before transmission, and the time units saved"""
+        return {"cancelled": self.cancelled, "deduplicated": self.deduplicated,
+                "units_saved": self.units_saved}
+    
+    def get_lane_stats(self):
+        """Queue depth and wait time per lane, keyed by lane name"""
+        now = time.monotonic()
+        report = {}
+        for priority in CommandPriority:
+            lane = self.lanes[priority]
+            stats = self.lane_stats[priority]
+            report[priority.name] = {
+                "depth": len(lane),
+                "sent": stats.sent,
+                "dropped": stats.dropped,
+                "avg_wait": stats.total_wait / stats.sent if stats.sent else 0.0,
+                "max_wait": stats.max_wait,
+                "oldest_wait": now - lane[0].queued_at if lane else 0.0,
+            }
+        return report
+    
+    def is_event(self, line):
+        """Tell unsolicited server lines apart from replies to our commands"""
+        if line == "dead" or line.startswith(EVENT_PREFIXES):
+            return True
+        # Ritual participants get the result without having sent Incantation
+        if line.startswith("Current level:"):
+            return not (self.sent_commands and self.sent_commands[0].command == "Incantation")
+        return False
     
     def add_response(self, response):
-        """Add received response"""
-        self.responses.put(response)
+        """Route a received line to the event channel or to the oldest sent command"""
+        if self.is_event(response):
+            self.events.append((next(self.arrivals), response))
+            return None
         
-        # Remove one command from sent queue (FIFO order)
-        with self.lock:
-            if self.sent_commands:
-                self.sent_commands.popleft()
+        if self.sent_commands:
+            future = self.sent_commands.popleft()
+        else:
+            # Handshake lines (WELCOME, world size) answer nothing we sent
+            future = CommandFuture(None)
+        subscribed = bool(future.callbacks)
+        future.resolve(response)
+        if future.sent_at is not None:
+            if self.window:
+                self.window.on_reply(future)
+            if self.estimator:
+                self.estimator.observe(command_cost(future.command), future.sent_at, future.replied_at)
+        if not subscribed:
+            future.arrival = next(self.arrivals)
+            self.responses.append(future)
+        return future
     
-    def get_response(self, timeout=None):
-        """Get next response (blocking)"""
-        try:
-            return self.responses.get(timeout=timeout)
-        except queue.Empty:
+    def get_reply(self):
+        """Get next resolved future without blocking"""
+        if self.responses:
+            return self.responses.popleft()
+        return None
+    
+    def get_response(self):
+        """Get next reply line without blocking"""
+        future = self.get_reply()
+        return future.response if future else None
+    
+    def get_event(self):
+        """Get next unsolicited line without blocking"""
+        if self.events:
+            return self.events.popleft()[1]
+        return None
+    
+    def get_next(self):
+        """Get the earliest received of the queued replies and events without blocking,
+        as ("reply", future) or ("event", line); None when both are empty"""
+        if self.responses and (not self.events or self.responses[0].arrival < self.events[0][0]):
+            return "reply", self.responses.popleft()
+        if self.events:
+            return "event", self.events.popleft()[1]
+        return None
+
+class LineFramer:
+    """Splits the received byte stream into lines.
+
+    Data is read with recv_into into one reusable buffer. Only the region up
+    to the last newline is decoded, with a single decode and split per read;
+    the unterminated tail is kept as bytes until its newline arrives.
+    """
+
+    def __init__(self, chunk_size=65536):
+        self.chunk = bytearray(chunk_size)
+        self.view = memoryview(self.chunk)
+        self.partial = bytearray()  # Start of a line not yet terminated by '\n'
+
+    def recv_from(self, sock):
+        """Read from sock into the reusable buffer and return the complete lines.
+        Returns None when the peer closed the connection."""
+        received = sock.recv_into(self.chunk)
+        if not received:
             return None
+        return self._split(self.chunk, self.view, received)
+
+    def feed(self, data):
+        """Frame a bytes or bytearray object that did not come from recv_from"""
+        return self._split(data, memoryview(data), len(data))
+
+    def _split(self, buf, view, size):
+        last = buf.rfind(b'\n', 0, size)
+        if last == -1:
+            self.partial += view[:size]
+            return []
+
+        # Everything up to the last newline is complete: decode it in one go
+        if self.partial:
+            self.partial += view[:last]
+            text = self.partial.decode('utf-8', 'replace')
+            self.partial.clear()
+        else:
+            text = str(view[:last], 'utf-8', 'replace')
+        if last + 1 < size:
+            self.partial += view[last + 1:size]
+        return text.split('\n')
 
 class NetworkClient:
-    def __init__(self, config):
+    def __init__(self, config, loop=None, time_model=None):
         self.host = config.machine
         self.port = config.port
         self.team_name = config.name
         self.socket = None
         self.connected = False
-        self.buffer = CommandBuffer()
+        self.window = WindowController(getattr(config, "window_profile", "throughput"))
+        self.time_model = time_model if time_model is not None else TimeModel()
+        self.buffer = CommandBuffer(window=self.window, estimator=self.time_model.estimator)
         
-        # Threading for continuous communication
-        self.receive_thread = None
-        self.send_thread = None
-        self.running = False
+        # Event loop driving the socket; may be shared by several clients
+        self.loop = loop if loop is not None else EventLoop()
+        self.owns_loop = loop is None
+        self.watching_write = False
         
-        # Received data buffer (for handling partial messages)
-        self.receive_buffer = ""
+        # Received data framing (for handling partial messages)
+        self.framer = LineFramer()
+        self.last_send_reused = False
+        self.arrived_at = None  # monotonic time the oldest unhandled line arrived
+        # Encoded commands not yet accepted by the kernel
+        self.send_buffer = bytearray()
         
         # World information from handshake
         self.world_width = 0
@@ -77,16 +452,13 @@ class NetworkClient:
             self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.socket.settimeout(10.0)  # 10 second timeout
             self.socket.connect((self.host, self.port))
+            self.socket.setblocking(False)
+            self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
             self.connected = True
             print(f"Connected to {self.host}:{self.port}")
             
-            # Start communication threads
-            self.running = True
-            self.receive_thread = threading.Thread(target=self._receive_loop, daemon=True)
-            self.send_thread = threading.Thread(target=self._send_loop, daemon=True)
-            
-            self.receive_thread.start()
-            self.send_thread.start()
+            # Socket I/O is dispatched by the event loop, no background threads
+            self.loop.register(self.socket, selectors.EVENT_READ, self._on_socket_event)
             
             # Perform handshake
             return self._handshake()
@@ -101,7 +473,7 @@ class NetworkClient:
         
         # Wait for WELCOME
         print("Waiting for WELCOME message...")
-        welcome = self.buffer.get_response(timeout=5)
+        welcome = self.get_response(timeout=5)
         if not welcome:
             print("Handshake Error: Did not receive WELCOME (timeout or empty).")
             return False
@@ -123,7 +495,7 @@ class NetworkClient:
 
         # Wait for client number
         print("Handshake: Waiting for client number...")
-        client_num_response = self.buffer.get_response(timeout=5)
+        client_num_response = self.get_response(timeout=5)
         if not client_num_response:
             print("Handshake Error: Did not receive client number (timeout or empty).")
             return False
@@ -138,7 +510,7 @@ class NetworkClient:
         
         # Wait for world dimensions
         print("Handshake: Waiting for world dimensions...")
-        dimensions = self.buffer.get_response(timeout=5)
+        dimensions = self.get_response(timeout=5)
         if not dimensions:
             print("Handshake Error: Did not receive world dimensions (timeout or empty).")
             return False
@@ -160,75 +532,179 @@ class NetworkClient:
         print("Handshake completed successfully!")
         return True
     
-    def _receive_loop(self):
-        """Continuous receiving loop (runs in separate thread)"""
-        while self.running and self.connected:
-            try:
-                # Set a short timeout to allow checking self.running
-                self.socket.settimeout(1.0)
-                data = self.socket.recv(1024)
-                
-                if not data:
-                    print("Server closed connection")
-                    break
-                
-                # Add to buffer and process complete messages
-                self.receive_buffer += data.decode('utf-8')
-                self._process_received_data()
-                
-            except socket.timeout:
-                continue  # Check if we should keep running
-            except socket.error as e:
-                print(f"Receive error: {e}")
-                break
+    def _on_socket_event(self, mask):
+        """Event loop callback: socket is readable and/or writable"""
+        if mask & selectors.EVENT_READ:
+            self._receive_ready()
+        if mask & selectors.EVENT_WRITE and self.connected:
+            self._flush_send_buffer()
+    
+    def _receive_ready(self):
+        """Read whatever the socket has, then refill the window freed by the replies"""
+        try:
+            lines = self.framer.recv_from(self.socket)
+        except (BlockingIOError, InterruptedError):
+            return
+        except socket.error as e:
+            print(f"Receive error: {e}")
+            self._connection_lost()
+            return
         
-        self.connected = False
-        print("Receive loop ended")
+        if lines is None:
+            print("Server closed connection")
+            self._connection_lost()
+            return
+        
+        self._process_received_lines(lines)
+        self._transmit_pending()
     
-    def _process_received_data(self):
-        """Process complete messages from receive buffer"""
-        while '\n' in self.receive_buffer:
-            # Extract one complete message
-            message, self.receive_buffer = self.receive_buffer.split('\n', 1)
+    def _process_received_lines(self, lines):
+        """Queue every complete message received in one read"""
+        if lines and self.arrived_at is None:
+            self.arrived_at = time.monotonic()
+        for message in lines:
             message = message.strip()
             
             if message:
                 print(f"Received: {message}")
                 self.buffer.add_response(message)
     
-    def _send_loop(self):
-        """Continuous sending loop (runs in separate thread)"""
-        while self.running and self.connected:
-            command = self.buffer.get_next_command()
-            
-            if command:
-                try:
-                    message = command + '\n'
-                    self.socket.sendall(message.encode('utf-8'))
-                    print(f"Sent: {command}") # Existing log, crucial for confirmation
-                except socket.error as e:
-                    print(f"Send error: {e}")
-                    self.connected = False
-                    break
-            else:
-                # No commands to send, wait a bit
-                # print("Send Loop: No command to send, sleeping.") # Optional: can be noisy
-                time.sleep(0.1)
+    def _transmit_pending(self):
+        """Move every command the window allows onto the wire immediately"""
+        future = self.buffer.get_next_command()
+        while future:
+            self.send_buffer += (future.command + '\n').encode('utf-8')
+            print(f"Sent: {future.command}")
+            future = self.buffer.get_next_command()
+        self._flush_send_buffer()
+    
+    def _flush_send_buffer(self):
+        """Write as much of the send buffer as the kernel accepts; watch for
+        writability only while something is left over"""
+        if self.send_buffer:
+            try:
+                written = self.socket.send(self.send_buffer)
+                del self.send_buffer[:written]
+            except (BlockingIOError, InterruptedError):
+                pass
+            except socket.error as e:
+                print(f"Send error: {e}")
+                self._connection_lost()
+                return
         
-        print(f"Send loop ended. self.running={self.running}, self.connected={self.connected}") # Modified log
+        want_write = bool(self.send_buffer)
+        if want_write != self.watching_write:
+            events = selectors.EVENT_READ | (selectors.EVENT_WRITE if want_write else 0)
+            self.loop.modify(self.socket, events, self._on_socket_event)
+            self.watching_write = want_write
     
-    def send_command(self, command):
-        """Add command to send queue"""
+    def _connection_lost(self):
+        """Stop watching the socket after an error or server close"""
+        self.connected = False
+        self.loop.unregister(self.socket)
+    
+    def send_command(self, command, callback=None, priority=CommandPriority.NORMAL, plan=None):
+        """Queue command in its priority lane, send it right away if the window
+        allows, and return its future. last_send_reused tells whether that is the
+        future of an identical query already outstanding (nothing new was queued)."""
+        self.last_send_reused = False
         if not self.connected:
             print(f"Cannot send command '{command}': not connected")
             return False
         
-        self.buffer.add_command(command)
-        return True
+        future = self.buffer.add_command(command, callback, priority, plan)
+        self.last_send_reused = self.buffer.last_reused
+        self._transmit_pending()
+        return future
+    
+    def new_plan(self):
+        """Allocate a token for the commands of one plan"""
+        return self.buffer.new_plan()
+    
+    def cancel_plan(self, plan):
+        """Drop the plan's commands that have not been transmitted yet"""
+        return self.buffer.cancel_plan(plan)
+    
+    def get_queue_savings(self):
+        """Cancellation and deduplication counters"""
+        return self.buffer.get_queue_savings()
+    
+    def free_slots(self):
+        """Room left in the in-flight window once queued commands are sent"""
+        return self.buffer.free_slots()
+    
+    def outstanding_units(self):
+        """Server time still committed to our queued and in-flight commands"""
+        return self.buffer.outstanding_units()
+    
+    def get_window_stats(self):
+        """Adaptive in-flight window and RTT measurements"""
+        return self.window.get_stats()
+    
+    def drop_pending(self, priority):
+        """Discard unsent commands of one priority lane"""
+        return self.buffer.drop_pending(priority)
+    
+    def defer_pending(self, priority):
+        """Push unsent commands of one priority lane behind background work"""
+        self.buffer.defer_pending(priority)
+    
+    def get_lane_stats(self):
+        """Per-lane queue depth and wait time counters"""
+        return self.buffer.get_lane_stats()
+    
+    def poll(self, timeout=None):
+        """Wait up to timeout for socket activity or a timer unless something is already waiting.
+        Returns the number of sockets and timers dispatched (1 if lines were already queued)."""
+        if self.buffer.responses or self.buffer.events or not self.connected:
+            return 1
+        return self.loop.run_once(timeout)
+    
+    def take_arrival_time(self):
+        """Monotonic arrival time of the oldest line received since the last call, or None"""
+        arrived_at, self.arrived_at = self.arrived_at, None
+        return arrived_at
+    
+    def has_in_flight(self, prefixes=None):
+        """Check if any command (or any starting with one of prefixes) is awaiting
+        its reply or still queued"""
+        if prefixes is None:
+            return bool(self.buffer.sent_commands) or self.buffer.has_pending()
+        pending = [self.buffer.sent_commands] + self.buffer.lanes
+        return any(future.command and future.command.startswith(prefixes) for queue in pending for future in queue)
+    
+    def _wait_for(self, fetch, timeout):
+        """Run the event loop until fetch() returns something or timeout expires"""
+        item = fetch()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        
+        while item is None and self.connected:
+            remaining = None
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+            self.loop.run_once(remaining)
+            item = fetch()
+        
+        return item
     
     def get_response(self, timeout=None):
-        """Get next response"""
-        return self.buffer.get_response(timeout)
+        """Get next reply line, running the event loop until one arrives or timeout expires"""
+        return self._wait_for(self.buffer.get_response, timeout)
+    
+    def get_reply(self, timeout=None):
+        """Like get_response, but return the resolved future (command, timings, reply)"""
+        return self._wait_for(self.buffer.get_reply, timeout)
+    
+    def get_event(self, timeout=None):
+        """Get next unsolicited line (broadcast, eject, elevation, death)"""
+        return self._wait_for(self.buffer.get_event, timeout)
+    
+    def get_next(self, timeout=None):
+        """Get the next reply or event in the order they were received,
+        as ("reply", future) or ("event", line)"""
+        return self._wait_for(self.buffer.get_next, timeout)
     
     def is_connected(self):
         """Check if still connected"""
@@ -245,16 +721,12 @@ class NetworkClient:
     def disconnect(self):
         """Clean shutdown"""
         print("Disconnecting...")
-        self.running = False
         
         if self.socket:
+            self.loop.unregister(self.socket)
             self.socket.close()
-        
-        # Wait for threads to finish (with timeout)
-        if self.receive_thread and self.receive_thread.is_alive():
-            self.receive_thread.join(timeout=2)
-        if self.send_thread and self.send_thread.is_alive():
-            self.send_thread.join(timeout=2)
+        if self.owns_loop:
+            self.loop.close()
         
         self.connected = False
-        print("Disconnected")
\ No newline at end of file
+        print("Disconnected")
@@ -0,0 +1,103 @@
+from collections import deque
+from network_client import CommandPriority
+from time_model import TimeModel, command_cost
+
+class PipelineExecutor:
+    """Runs one multi-step plan at a time, keeping the command window full.
+
+    A plan's steps are handed to send() as soon as the client has a free
+    window slot, without waiting for the replies of the earlier steps: moves,
+    takes and the follow-up Look all travel together. The first ko of a plan
+    rolls the rest back: unsent steps are dropped (locally or from the client
+    lanes), steps already on the wire still run and the world map only
+    follows their ok replies. Every reply is counted so that utilisation,
+    the share of elapsed server time spent executing our commands, can be
+    reported.
+    """
+
+    def __init__(self, client, send, time_model=None, lookahead=10):
+        self.client = client
+        self.send = send                 # send(command, priority, plan=...) -> future
+        self.time_model = time_model if time_model is not None else TimeModel()
+        self.lookahead = lookahead       # most steps of one plan unanswered at once
+        self.plan = None
+        self.priority = CommandPriority.NORMAL
+        self.steps = deque()             # steps of the current plan not handed to send() yet
+        self.inflight = set()            # futures of the current plan awaiting their reply
+        self.started = self.time_model.now()
+
+        self.busy_units = 0              # server time units of every answered command
+        self.replies = 0
+        self.plans = 0
+        self.speculative = 0             # steps sent while an earlier step was unanswered
+        self.rollbacks = 0
+        self.rolled_back = 0             # steps withdrawn before reaching the server
+        self.overrun = 0                 # steps already sent when their plan was rolled back
+
+    def busy(self):
+        """Check if the current plan still has steps to send or replies to wait for"""
+        return bool(self.steps or self.inflight)
+
+    def start(self, steps, priority=CommandPriority.NORMAL, follow_up="Look"):
+        """Replace the current plan with steps (then follow_up) and send what fits.
+        Returns the rollback of the previous plan, as rollback() does."""
+        withdrawn = self.rollback()
+        self.plan = self.client.new_plan()
+        self.priority = priority
+        self.steps.extend(steps)
+        if follow_up:
+            self.steps.append(follow_up)
+        self.plans += 1
+        self.pump()
+        return withdrawn
+
+    def pump(self):
+        """Send plan steps while the window has room"""
+        while self.steps and len(self.inflight) < self.lookahead and self.client.free_slots() > 0:
+            command = self.steps.popleft()
+            future = self.send(command, self.priority, plan=self.plan)
+            if not future:
+                self.steps.clear()
+                return
+            if self.inflight:
+                self.speculative += 1
+            if not future.done():
+                self.inflight.add(future)
+
+    def rollback(self):
+        """Abandon the current plan. Returns (steps withdrawn, cancelled futures);
+        the futures had already been given to send() but never transmitted."""
+        cancelled = self.client.cancel_plan(self.plan) if self.plan is not None else []
+        withdrawn = len(self.steps) + len(cancelled)
+        self.inflight.difference_update(cancelled)
+        if withdrawn or self.inflight:
+            self.rollbacks += 1
+            self.rolled_back += withdrawn
+            self.overrun += len(self.inflight)
+        self.steps.clear()
+        self.inflight.clear()
+        self.plan = None
+        return withdrawn, cancelled
+
+    def on_reply(self, reply):
+        """Account for one reply, roll back on the plan's first ko and refill the window.
+        Returns the rollback (steps, cancelled futures) if this reply caused one, else None."""
+        if reply.command:
+            self.busy_units += command_cost(reply.command)
+            self.replies += 1
+        rolled_back = None
+        if reply in self.inflight:
+            self.inflight.discard(reply)
+            if reply.response == "ko":
+                rolled_back = self.rollback()
+        self.pump()
+        return rolled_back
+
+    def get_stats(self):
+        """Utilisation (busy / elapsed server time units) and speculation counters"""
+        elapsed = self.time_model.units_since(self.started)
+        return {"utilisation": self.busy_units / elapsed if elapsed > 0 else 0.0,
+                "busy_units": self.busy_units, "elapsed_units": elapsed,
+                "commands_per_100_units": 100 * self.replies / elapsed if elapsed > 0 else 0.0,
+                "plans": self.plans, "speculative": self.speculative, "rollbacks": self.rollbacks,
+                "rolled_back": self.rolled_back, "overrun": self.overrun}
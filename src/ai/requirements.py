@@ -0,0 +1,108 @@
+from itertools import combinations
+from resources import RESOURCES
+
+MAX_LEVEL = 8
+
+# Per level: players on the tile, and stones as a vector in RESOURCES order (food always 0)
+ELEVATION_PLAYERS = {1: 1, 2: 2, 3: 2, 4: 4, 5: 4, 6: 6, 7: 6}
+ELEVATION_STONES = {
+    1: (0, 1, 0, 0, 0, 0, 0),
+    2: (0, 1, 1, 1, 0, 0, 0),
+    3: (0, 2, 0, 1, 0, 2, 0),
+    4: (0, 1, 1, 2, 0, 1, 0),
+    5: (0, 1, 2, 1, 3, 0, 0),
+    6: (0, 1, 2, 3, 0, 1, 0),
+    7: (0, 2, 2, 2, 2, 2, 1),
+}
+
+def stone_requirements(level):
+    """Stones needed for a level as {name: count}, only the non-zero ones"""
+    return {name: count for name, count in zip(RESOURCES, ELEVATION_STONES.get(level, ())) if count}
+
+def pooled(vectors):
+    """Element-wise sum of RESOURCES-order vectors"""
+    return tuple(map(sum, zip(*vectors))) if vectors else (0,) * len(RESOURCES)
+
+def expand(missing):
+    """Deficit vector to the list-of-names form (["sibur", "sibur", ...])"""
+    names = []
+    for name, count in zip(RESOURCES, missing):
+        names.extend([name] * count)
+    return names
+
+class RequirementEngine:
+    """Elevation deficits memoized by (level, version).
+
+    The caller picks the version (e.g. PlayerState.version) and passes a
+    function building the inventory vector, which only runs on a cache miss.
+    """
+
+    def __init__(self, cache_size=16):
+        self.cache_size = cache_size
+        self._results = {}   # (level, version) -> (deficit vector, missing names)
+
+    @staticmethod
+    def players(level):
+        """Players that must stand on the tile for a level's ritual"""
+        return ELEVATION_PLAYERS.get(level, 1)
+
+    @staticmethod
+    def stones(level):
+        """Stones needed for a level as {name: count}, only the non-zero ones"""
+        return stone_requirements(level)
+
+    @staticmethod
+    def shortfall(level, vector):
+        """Stones still missing for a level given a RESOURCES-order vector (zeros when met)"""
+        needed = ELEVATION_STONES.get(level)
+        if needed is None:
+            return (0,) * len(RESOURCES)
+        return tuple(need - have if have < need else 0 for need, have in zip(needed, vector))
+
+    def _lookup(self, level, version, vector_fn):
+        key = (level, version)
+        result = self._results.get(key)
+        if result is None:
+            if len(self._results) >= self.cache_size:
+                self._results.clear()
+            missing = self.shortfall(level, vector_fn())
+            result = self._results[key] = (missing, tuple(expand(missing)))
+        return result
+
+    def deficit(self, level, version, vector_fn):
+        """Deficit vector for a level"""
+        return self._lookup(level, version, vector_fn)[0]
+
+    def missing(self, level, version, vector_fn):
+        """Missing stones as a tuple of names, one entry per stone"""
+        return self._lookup(level, version, vector_fn)[1]
+
+    def smallest_group(self, level, own, teammates, exact_limit=12):
+        """Smallest set of teammate ids whose stones, pooled with ours, meet the level.
+
+        teammates maps id -> vector. Only teammates holding something we lack are
+        considered; up to exact_limit of them are searched exhaustively by size,
+        beyond that the one covering most of the remaining deficit is added first.
+        Returns a tuple of ids (empty if we need nobody), or None if the team can't.
+        """
+        missing = self.shortfall(level, own)
+        if not any(missing):
+            return ()
+        helpful = {pid: vector for pid, vector in teammates.items()
+                   if any(need and have for need, have in zip(missing, vector))}
+        if any(self.shortfall(level, pooled([own] + list(helpful.values())))):
+            return None
+
+        if len(helpful) <= exact_limit:
+            for size in range(1, len(helpful) + 1):
+                for group in combinations(helpful, size):
+                    if not any(self.shortfall(level, pooled([own] + [helpful[pid] for pid in group]))):
+                        return group
+            return None
+
+        group = []
+        while any(missing):
+            pid = max(helpful, key=lambda p: sum(min(need, have) for need, have in zip(missing, helpful[p])))
+            group.append(pid)
+            missing = tuple(need - min(need, have) for need, have in zip(missing, helpful.pop(pid)))
+        return tuple(group)
@@ -0,0 +1,171 @@
+from array import array
+from itertools import count
+
+# Fixed order of everything an inventory or a map tile can hold.
+# Array-backed structures index their columns with these lists.
+RESOURCES = ["food", "linemate", "deraumere", "sibur", "mendiane", "phiras", "thystame"]
+STONES = RESOURCES[1:]
+
+TILE_FIELDS = ["player"] + RESOURCES
+FIELD_INDEX = {name: i for i, name in enumerate(TILE_FIELDS)}
+RESOURCE_INDEX = {name: i for i, name in enumerate(RESOURCES)}
+
+class LookCounts:
+    """A Look reply as a fixed-shape count matrix: one row of TILE_FIELDS per tile,
+    stored flat in an array('H') so row i starts at i * len(TILE_FIELDS)."""
+
+    def __init__(self, tile_count):
+        self.tile_count = tile_count
+        self.fields = len(TILE_FIELDS)
+        self.counts = array('H', bytes(2 * tile_count * self.fields))
+
+    def get(self, index, name):
+        """How many of a resource (or players) lie on a tile"""
+        return self.counts[index * self.fields + FIELD_INDEX[name]]
+
+    def tile(self, index):
+        """Counts of one tile in TILE_FIELDS order"""
+        base = index * self.fields
+        return self.counts[base:base + self.fields]
+
+    def locations(self, name):
+        """Indices of the tiles holding at least one of a resource"""
+        field = FIELD_INDEX[name]
+        counts = self.counts
+        step = self.fields
+        return [i for i in range(self.tile_count) if counts[i * step + field]]
+
+# Tile strings repeat a lot between Look replies ("", "food", "linemate"...),
+# so each distinct one is tokenized once and its count row reused
+_TILE_ROWS = {}
+TILE_CACHE_LIMIT = 4096
+
+def tile_row(tile):
+    """Count row of one Look tile string, in TILE_FIELDS order"""
+    row = _TILE_ROWS.get(tile)
+    if row is None:
+        row = array('H', bytes(2 * len(TILE_FIELDS)))
+        for token in tile.split():
+            field = FIELD_INDEX.get(token)
+            if field is not None:
+                row[field] += 1
+        if len(_TILE_ROWS) >= TILE_CACHE_LIMIT:
+            _TILE_ROWS.clear()
+        _TILE_ROWS[tile] = row
+    return row
+
+def parse_look(reply):
+    """Tokenize a Look reply in one pass into a LookCounts.
+    Unknown tokens are ignored; empty tiles stay all-zero."""
+    tiles = reply.strip().strip("[]").split(",")
+    look = LookCounts(len(tiles))
+    counts = look.counts
+    step = look.fields
+    base = 0
+    for tile in tiles:
+        counts[base:base + step] = tile_row(tile)
+        base += step
+    return look
+
+class InventorySnapshot:
+    """One Inventory reply, frozen: counts in RESOURCES order and a version number.
+    Versions grow with every snapshot taken, so they can key derived caches."""
+
+    __slots__ = ("counts", "version")
+
+    def __init__(self, counts, version):
+        object.__setattr__(self, "counts", tuple(counts))
+        object.__setattr__(self, "version", version)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("InventorySnapshot is immutable")
+
+    def get(self, name, default=0):
+        """Count of one resource"""
+        index = RESOURCE_INDEX.get(name)
+        return default if index is None else self.counts[index]
+
+    def as_dict(self):
+        return dict(zip(RESOURCES, self.counts))
+
+_next_version = count(1)
+
+def parse_inventory(reply):
+    """Parse "[food 9, linemate 1, ...]" in one pass, without regex.
+    Returns an InventorySnapshot, or None if the reply is not an inventory."""
+    counts = [0] * len(RESOURCES)
+    found = False
+    for item in reply.strip().strip("[]").split(","):
+        parts = item.split()
+        if not parts:
+            continue
+        if len(parts) != 2 or not parts[1].isdigit():
+            return None
+        index = RESOURCE_INDEX.get(parts[0])
+        if index is not None:
+            counts[index] = int(parts[1])
+            found = True
+    if not found:
+        return None
+    return InventorySnapshot(counts, next(_next_version))
+
+class InventoryLedger:
+    """Our inventory between Inventory replies, kept from our own acknowledged
+    Take/Set. Stones are exact; food decays, so its count comes from
+    food_estimate() (e.g. SimpleSurvivalManager.predicted_food).
+
+    drift is set whenever the ledger can no longer vouch for itself (nothing
+    reconciled yet, a refused Set, a ritual, an eject...); the owner then
+    asks the server and feeds the reply to reconcile().
+    """
+
+    def __init__(self, food_estimate=None):
+        self.food_estimate = food_estimate
+        self.counts = [0] * len(RESOURCES)
+        self.drift = True
+        self.applied = 0          # Take/Set replies folded in
+        self.mismatches = 0       # reconciliations that found the stones off
+
+    def snapshot(self):
+        """Current ledger as a new InventorySnapshot"""
+        counts = list(self.counts)
+        if self.food_estimate is not None:
+            counts[RESOURCE_INDEX["food"]] = self.food_estimate()
+        return InventorySnapshot(counts, next(_next_version))
+
+    def apply(self, command, response):
+        """Fold in the reply to one of our commands.
+        Returns a snapshot if the inventory changed, else None."""
+        if not command or not command.startswith(("Take ", "Set ")):
+            return None
+        action, name = command.split(" ", 1)
+        index = RESOURCE_INDEX.get(name)
+        if index is None:
+            return None
+        if response == "ko":
+            if action == "Set":
+                # The server says we hold none: our count was wrong
+                self.counts[index] = 0
+                self.drift = True
+            return None
+        if response != "ok":
+            return None
+        if action == "Take":
+            self.counts[index] += 1
+        elif self.counts[index]:
+            self.counts[index] -= 1
+        self.applied += 1
+        return self.snapshot()
+
+    def mark_drift(self):
+        """Something we did not observe may have changed the inventory"""
+        self.drift = True
+
+    def reconcile(self, snapshot):
+        """Adopt an Inventory reply. Returns True if our stones had drifted."""
+        drifted = any(self.counts[i] != snapshot.counts[i] for i in range(1, len(RESOURCES)))
+        if drifted:
+            self.mismatches += 1
+        self.counts = list(snapshot.counts)
+        self.drift = False
+        return drifted
@@ -0,0 +1,95 @@
+import heapq
+from collections import Counter
+from time_model import TimeModel
+
+class TeammateRegistry:
+    """Live teammates heard from recently, indexed by level.
+
+    Each broadcast refreshes its sender's deadline (timeout time units ahead).
+    Deadlines sit in a heap with lazy deletion: stale heap entries are skipped
+    when popped, and the heap is rebuilt if it grows well past the number of
+    teammates. level_counts always matches the live entries, so counting
+    teammates at a level is a dict lookup. Beyond max_entries the teammate
+    heard from least recently is evicted.
+    """
+
+    def __init__(self, time_model=None, timeout=3000, max_entries=256):
+        self.time_model = time_model if time_model is not None else TimeModel()
+        self.timeout = timeout
+        self.max_entries = max_entries
+        self.entries = {}              # pid -> status dict (last_seen, direction, level, ...)
+        self.deadlines = []            # heap of (expires_at, pid)
+        self.level_counts = Counter()
+        self.expired = 0
+        self.evicted = 0
+        self.on_forget = []            # callbacks(pid) run when a teammate is dropped
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, pid):
+        return pid in self.entries
+
+    def get(self, pid, default=None):
+        return self.entries.get(pid, default)
+
+    def items(self):
+        return self.entries.items()
+
+    def touch(self, pid, direction=None, now=None):
+        """Record a message from pid and return its (mutable) status entry"""
+        now = now if now is not None else self.time_model.now()
+        status = self.entries.get(pid)
+        if status is None:
+            status = self.entries[pid] = {}
+        status['last_seen'] = now
+        status['direction'] = direction
+        status['expires_at'] = now + self.time_model.seconds(self.timeout)
+        heapq.heappush(self.deadlines, (status['expires_at'], pid))
+
+        if len(self.deadlines) > 4 * len(self.entries) + 64:
+            self.deadlines = [(s['expires_at'], p) for p, s in self.entries.items()]
+            heapq.heapify(self.deadlines)
+        while len(self.entries) > self.max_entries:
+            self._pop_oldest()
+            self.evicted += 1
+        return status
+
+    def set_level(self, pid, level):
+        """Update the level of a known teammate, keeping level_counts in step"""
+        status = self.entries.get(pid)
+        if status is None:
+            return
+        old = status.get('level')
+        if old == level:
+            return
+        if old is not None:
+            self.level_counts[old] -= 1
+        if level is not None:
+            self.level_counts[level] += 1
+        status['level'] = level
+
+    def expire(self, now=None):
+        """Drop every teammate whose deadline has passed"""
+        now = now if now is not None else self.time_model.now()
+        while self.deadlines and self.deadlines[0][0] <= now:
+            if self._pop_oldest():
+                self.expired += 1
+
+    def live_count(self, level):
+        """Number of live teammates last seen at the given level"""
+        self.expire()
+        return self.level_counts[level]
+
+    def _pop_oldest(self):
+        """Pop the earliest deadline; forget its teammate unless it was refreshed since"""
+        expires_at, pid = heapq.heappop(self.deadlines)
+        status = self.entries.get(pid)
+        if status is None or status['expires_at'] != expires_at:
+            return False
+        del self.entries[pid]
+        if status.get('level') is not None:
+            self.level_counts[status['level']] -= 1
+        for callback in self.on_forget:
+            callback(pid)
+        return True
@@ -0,0 +1,124 @@
+import time
+from collections import deque
+
+# Server time units consumed by each action (divide by f for seconds)
+COMMAND_COSTS = {
+    "Forward": 7, "Right": 7, "Left": 7, "Look": 7, "Inventory": 1,
+    "Broadcast": 7, "Connect_nbr": 0, "Fork": 42, "Eject": 7,
+    "Take": 7, "Set": 7, "Incantation": 300,
+}
+
+# Server default for -f; the wall-clock timings of the AI were tuned at this value
+DEFAULT_FREQUENCY = 100
+
+def command_cost(command):
+    """Time units the server spends executing command"""
+    return COMMAND_COSTS.get(command.split(" ", 1)[0], 0)
+
+class FrequencyEstimator:
+    """Estimates the server frequency f online from reply timing.
+
+    The server runs one player's commands back to back. When a command was
+    already waiting on the server as the previous one completed, the gap
+    between the two replies is exactly its cost / f, network latency cancels
+    out. Gaps and costs are summed over a sliding window (replies read in the
+    same recv give a zero gap, the sum stays right). Until such samples exist,
+    isolated commands give the lower bound cost / rtt.
+    """
+
+    def __init__(self, initial=DEFAULT_FREQUENCY, window=64):
+        self.initial = initial
+        self.samples = deque(maxlen=window)   # (cost, gap) of back-to-back replies
+        self.unit_sum = 0
+        self.gap_sum = 0.0
+        self.lower_bound = None                # Best cost / rtt of isolated commands
+        self.min_rtt = None
+        self.last_reply_at = None
+
+    def observe(self, cost, sent_at, replied_at):
+        """Feed the cost and timing of one resolved command"""
+        previous = self.last_reply_at
+        self.last_reply_at = replied_at
+        if sent_at is None:
+            return
+        rtt = replied_at - sent_at
+        if self.min_rtt is None or rtt < self.min_rtt:
+            self.min_rtt = rtt
+        if cost <= 0:
+            return
+
+        if previous is not None and sent_at + self.min_rtt < previous:
+            self._add_sample(cost, replied_at - previous)
+        elif rtt > 0:
+            bound = cost / rtt
+            if self.lower_bound is None or bound > self.lower_bound:
+                self.lower_bound = bound
+
+    def _add_sample(self, cost, gap):
+        if len(self.samples) == self.samples.maxlen:
+            old_cost, old_gap = self.samples[0]
+            self.unit_sum -= old_cost
+            self.gap_sum -= old_gap
+        self.samples.append((cost, gap))
+        self.unit_sum += cost
+        self.gap_sum += gap
+
+    def confident(self, min_samples=16, max_spread=0.25):
+        """Check that the window holds min_samples back-to-back samples and that
+        its older and newer halves agree on f to within max_spread"""
+        if len(self.samples) < min_samples:
+            return False
+        half = len(self.samples) // 2
+        rates = []
+        for part in (list(self.samples)[:half], list(self.samples)[half:]):
+            gap = sum(gap for _, gap in part)
+            if gap <= 0:
+                return False
+            rates.append(sum(cost for cost, _ in part) / gap)
+        return abs(rates[0] - rates[1]) <= max_spread * max(rates)
+
+    @property
+    def frequency(self):
+        """Current estimate of f (time units per second)"""
+        if len(self.samples) >= 3 and self.gap_sum > 0:
+            return max(1.0, self.unit_sum / self.gap_sum)
+        if self.lower_bound is not None:
+            return max(1.0, self.lower_bound)
+        return float(self.initial)
+
+class TimeModel:
+    """Cost model shared by the managers: timeouts and intervals are expressed
+    in server time units and converted with the estimated f. clock stands in
+    for time.time, so simulations can run on their own timeline."""
+
+    def __init__(self, estimator=None, clock=time.time):
+        self.estimator = estimator if estimator is not None else FrequencyEstimator()
+        self.clock = clock
+
+    def now(self):
+        """Current wall-clock time as seen through clock"""
+        return self.clock()
+
+    @property
+    def frequency(self):
+        return self.estimator.frequency
+
+    def confident(self):
+        """Check that the estimate of f rests on enough consistent samples"""
+        return self.estimator.confident()
+
+    def seconds(self, units):
+        """Wall-clock duration of units time units"""
+        return units / self.estimator.frequency
+
+    def units(self, seconds):
+        """Time units elapsed in a wall-clock duration"""
+        return seconds * self.estimator.frequency
+
+    def units_since(self, start_time):
+        """Time units elapsed since a now() timestamp"""
+        return (self.clock() - start_time) * self.estimator.frequency
+
+    def cost(self, command):
+        """Time units command will take on the server"""
+        return command_cost(command)
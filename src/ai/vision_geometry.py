@@ -0,0 +1,44 @@
+import math
+
+# Orientations in Right-turn order; y grows towards the south
+NORTH, EAST, SOUTH, WEST = range(4)
+STEPS = [(0, -1), (1, 0), (0, 1), (-1, 0)]
+
+# Level 8 sees 8 rows ahead: 81 tiles
+MAX_DEPTH = 8
+TILE_COUNT = (MAX_DEPTH + 1) ** 2
+
+def vision_offset(index):
+    """(forward, lateral) offset of a Look tile index, lateral positive to the right.
+    Row d of the cone holds indices d*d .. d*d + 2d, centred on d*d + d."""
+    depth = math.isqrt(index)
+    return depth, index - depth * depth - depth
+
+def _actions_for(forward, lateral):
+    """Forward to the tile's row, then turn once and walk sideways"""
+    actions = ["Forward"] * forward
+    if lateral:
+        actions.append("Right" if lateral > 0 else "Left")
+        actions += ["Forward"] * abs(lateral)
+    return tuple(actions)
+
+def _world_delta(forward, lateral, orientation):
+    fx, fy = STEPS[orientation]
+    rx, ry = STEPS[(orientation + 1) % 4]
+    return forward * fx + lateral * rx, forward * fy + lateral * ry
+
+# Everything below is indexed by Look tile index and built once at import
+TILE_OFFSETS = tuple(vision_offset(i) for i in range(TILE_COUNT))
+TILE_DEPTHS = tuple(forward for forward, _ in TILE_OFFSETS)
+TILE_ACTIONS = tuple(_actions_for(*offset) for offset in TILE_OFFSETS)
+WORLD_DELTAS = tuple(tuple(_world_delta(forward, lateral, o) for forward, lateral in TILE_OFFSETS)
+                     for o in range(4))
+
+# Tiles ordered by how many actions it takes to reach them (ties by index)
+SEARCH_ORDER = tuple(sorted(range(TILE_COUNT), key=lambda i: (len(TILE_ACTIONS[i]), i)))
+
+def tile_actions(index):
+    """Cached movement to a Look tile (a tuple; copy it before mutating)"""
+    if index < TILE_COUNT:
+        return TILE_ACTIONS[index]
+    return _actions_for(*vision_offset(index))
@@ -0,0 +1,213 @@
+from array import array
+from resources import TILE_FIELDS, FIELD_INDEX, LookCounts
+from time_model import TimeModel, command_cost
+from vision_geometry import NORTH, STEPS, WORLD_DELTAS, vision_offset
+
+STEP_UNITS = command_cost("Forward")
+
+# eject: K names the side we were pushed from (1 front, 3 left, 5 back, 7 right);
+# we moved away from it, as (forward, lateral) in our own frame
+EJECT_MOVES = {1: (-1, 0), 3: (0, 1), 5: (1, 0), 7: (0, -1)}
+
+class WorldMap:
+    """Persistent knowledge of the torus built from successive Look replies.
+
+    The player pose is dead-reckoned from acknowledged moves in a frame whose
+    origin is where we started (the server never tells us our coordinates).
+    Tile contents live in one flat array('H') of width*height*len(TILE_FIELDS)
+    counts, with the observation time of each tile in a parallel array('d'),
+    so large maps stay a few hundred kilobytes.
+
+    Two horizons apply to an observation. Its resource counts are trusted
+    for stale_after time units, by default the time to walk across the torus
+    and back (at least 84); after that the tile reads as unknown to
+    tile_counts() and find(). That the tile was visited at all is remembered
+    for explored_after, by default long enough to sweep the whole map, which
+    is what exploration goes by.
+    """
+
+    def __init__(self, width, height, time_model=None, stale_after=None, explored_after=None):
+        self.width = max(1, width)
+        self.height = max(1, height)
+        self.time_model = time_model if time_model is not None else TimeModel()
+        if stale_after is None:
+            stale_after = max(84, (self.width + self.height) * STEP_UNITS)
+        if explored_after is None:
+            explored_after = max(10 * stale_after, self.width * self.height * STEP_UNITS)
+        self.stale_after = stale_after
+        self.explored_after = explored_after
+        self.fields = len(TILE_FIELDS)
+
+        tiles = self.width * self.height
+        self.counts = array('H', bytes(2 * tiles * self.fields))
+        self.seen_at = array('d', bytes(8 * tiles))   # 0.0 = never observed
+
+        self.x = 0
+        self.y = 0
+        self.orientation = NORTH
+        self.revealed = 0    # tiles a Look turned from unexplored into explored
+
+    def tile_index(self, x, y):
+        """Flat index of a (wrapped) world coordinate"""
+        return (y % self.height) * self.width + (x % self.width)
+
+    def relative_to_world(self, forward, lateral, x=None, y=None, orientation=None):
+        """World coordinate of an offset expressed in the player's frame"""
+        x = self.x if x is None else x
+        y = self.y if y is None else y
+        orientation = self.orientation if orientation is None else orientation
+        fx, fy = STEPS[orientation]
+        rx, ry = STEPS[(orientation + 1) % 4]
+        return ((x + forward * fx + lateral * rx) % self.width,
+                (y + forward * fy + lateral * ry) % self.height)
+
+    def apply_action(self, command):
+        """Dead-reckon an acknowledged Forward/Right/Left"""
+        self.x, self.y, self.orientation = self.pose_after([command])
+    
+    def pose_after(self, commands, pose=None):
+        """(x, y, orientation) reached from a pose (default: ours) once commands have run;
+        anything but Forward/Right/Left leaves the pose unchanged"""
+        x, y, orientation = pose if pose is not None else (self.x, self.y, self.orientation)
+        for command in commands:
+            if command == "Forward":
+                x, y = self.relative_to_world(1, 0, x, y, orientation)
+            elif command == "Right":
+                orientation = (orientation + 1) % 4
+            elif command == "Left":
+                orientation = (orientation - 1) % 4
+        return x, y, orientation
+
+    def apply_eject(self, direction):
+        """Move the pose after being ejected; an unexpected direction loses our bearings"""
+        move = EJECT_MOVES.get(direction)
+        if move is None:
+            self.forget()
+            return
+        self.x, self.y = self.relative_to_world(*move)
+
+    def forget(self):
+        """Drop every observation (e.g. when the pose can no longer be trusted)"""
+        for i in range(len(self.seen_at)):
+            self.seen_at[i] = 0.0
+
+    def merge_look(self, look, now=None):
+        """Store a parsed Look reply (resources.LookCounts) relative to the current pose"""
+        now = now if now is not None else self.time_model.now()
+        cutoff = now - self.time_model.seconds(self.explored_after)
+        fields = self.fields
+        deltas = WORLD_DELTAS[self.orientation]
+        for index in range(look.tile_count):
+            if index < len(deltas):
+                dx, dy = deltas[index]
+                tile = self.tile_index(self.x + dx, self.y + dy)
+            else:
+                tile = self.tile_index(*self.relative_to_world(*vision_offset(index)))
+            base = tile * fields
+            self.counts[base:base + fields] = look.counts[index * fields:(index + 1) * fields]
+            if self.seen_at[tile] < cutoff:
+                self.revealed += 1
+            self.seen_at[tile] = now
+
+    def cone_tiles(self, level, pose=None):
+        """Flat tile indices a Look at a level would report from a pose, in Look order"""
+        x, y, orientation = pose if pose is not None else (self.x, self.y, self.orientation)
+        deltas = WORLD_DELTAS[orientation]
+        tiles = []
+        for index in range((level + 1) ** 2):
+            if index < len(deltas):
+                dx, dy = deltas[index]
+                tiles.append(self.tile_index(x + dx, y + dy))
+            else:
+                tiles.append(self.tile_index(*self.relative_to_world(*vision_offset(index), x, y, orientation)))
+        return tiles
+
+    def cone_confidence(self, level, pose=None, max_age=None):
+        """Share of the Look cone known and fresh, 0.0 if our own tile is not"""
+        max_age = self.stale_after if max_age is None else max_age
+        if max_age <= 0:
+            return 0.0
+        cutoff = self.time_model.now() - self.time_model.seconds(max_age)
+        tiles = self.cone_tiles(level, pose)
+        if self.seen_at[tiles[0]] < cutoff:
+            return 0.0
+        return sum(1 for tile in tiles if self.seen_at[tile] >= cutoff) / len(tiles)
+
+    def synthetic_look(self, level):
+        """The Look reply expected from here, rebuilt from the map as a LookCounts.
+        Unknown or stale tiles read as empty; pair it with cone_confidence()."""
+        tiles = self.cone_tiles(level)
+        look = LookCounts(len(tiles))
+        fields = self.fields
+        cutoff = self.time_model.now() - self.time_model.seconds(self.stale_after)
+        for index, tile in enumerate(tiles):
+            if self.seen_at[tile] < cutoff:
+                continue
+            base = tile * fields
+            look.counts[index * fields:(index + 1) * fields] = self.counts[base:base + fields]
+        return look
+
+    def age_units(self, x, y):
+        """Time units since the tile was observed, or None if never seen"""
+        seen = self.seen_at[self.tile_index(x, y)]
+        if not seen:
+            return None
+        return self.time_model.units_since(seen)
+
+    def is_fresh(self, x, y, max_age=None):
+        """Check if the tile was observed recently enough to be trusted"""
+        age = self.age_units(x, y)
+        return age is not None and age <= (self.stale_after if max_age is None else max_age)
+
+    def tile_counts(self, x, y, max_age=None):
+        """Counts of the tile in TILE_FIELDS order, or None when unknown or stale"""
+        if not self.is_fresh(x, y, max_age):
+            return None
+        base = self.tile_index(x, y) * self.fields
+        return self.counts[base:base + self.fields]
+
+    def current_tile(self, max_age=None):
+        """Counts of the tile we stand on, or None when unknown or stale"""
+        return self.tile_counts(self.x, self.y, max_age)
+
+    def adjust_current(self, resource, delta):
+        """Apply our own acknowledged Take (-1) or Set (+1) to the current tile"""
+        field = FIELD_INDEX.get(resource)
+        if field is None:
+            return
+        base = self.tile_index(self.x, self.y) * self.fields
+        self.counts[base + field] = max(0, self.counts[base + field] + delta)
+
+    def clear_current(self, resource):
+        """Record that the current tile holds none of a resource (our Take was refused)"""
+        field = FIELD_INDEX.get(resource)
+        if field is not None:
+            self.counts[self.tile_index(self.x, self.y) * self.fields + field] = 0
+
+    def is_explored(self, x, y):
+        """Check if the tile was observed within explored_after (its counts may be stale)"""
+        return self.is_fresh(x, y, self.explored_after)
+
+    def explored_fraction(self):
+        """Share of the map observed within explored_after"""
+        return self.known_fraction(self.explored_after)
+
+    def known_fraction(self, max_age=None):
+        """Share of the map currently known and fresh"""
+        max_age = self.stale_after if max_age is None else max_age
+        cutoff = self.time_model.now() - self.time_model.seconds(max_age)
+        fresh = sum(1 for seen in self.seen_at if seen and seen >= cutoff)
+        return fresh / len(self.seen_at)
+
+    def find(self, resource, max_age=None):
+        """Fresh tiles holding a resource, as a list of (x, y, count)"""
+        field = FIELD_INDEX[resource]
+        max_age = self.stale_after if max_age is None else max_age
+        cutoff = self.time_model.now() - self.time_model.seconds(max_age)
+        found = []
+        for tile, seen in enumerate(self.seen_at):
+            if seen and seen >= cutoff:
+                count = self.counts[tile * self.fields + field]
+                if count:
+                    found.append((tile % self.width, tile // self.width, count))
+        return found
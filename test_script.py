@@ -8,8 +8,13 @@ import subprocess
 import time
 import sys
 import threading
+import os
+import random
 from test_server import TestZappyServer
 
+# The AI modules are imported directly by the tests that need no server
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "src", "ai"))
+
 class AITester:
     def __init__(self):
         self.server = None
@@ -31,8 +36,8 @@ class AITester:
             print("Test server stopped")
     
     def test_basic_connection(self):
-        """Test 1: Basic connection and handshake"""
-        print("\n=== TEST 1: Basic Connection ===")
+        """Test 8: Basic connection and handshake"""
+        print("\n=== TEST 8: Basic Connection ===")
         try:
             # Run your AI for a short time
             result = subprocess.run([
@@ -84,8 +89,8 @@ class AITester:
             print(f"Invalid args test error: {e}")
     
     def test_network_components(self):
-        """Test 3: Network components individually"""
-        print("\n=== TEST 3: Network Components ===")
+        """Test 1: Network components individually"""
+        print("\n=== TEST 1: Network Components ===")
         
         # Test importing your modules
         try:
@@ -110,6 +115,190 @@ class AITester:
         except Exception as e:
             print(f"✗ Module test failed: {e}")
     
+    def test_team_codec(self):
+        """Test 3: Team messages survive a round trip and foreign ones are rejected"""
+        print("\n=== TEST 3: Team Codec ===")
+        from team_codec import TeamCodec, SEQ_MODULO, pid_hash
+
+        codec = TeamCodec("alpha")
+        pid = pid_hash("alpha_player_0")
+        message = codec.encode_inventory(pid, 3, {"linemate": 2, "thystame": 1}, seq=SEQ_MODULO + 5)
+        decoded = codec.decode(message)
+        ok = True
+        if decoded and decoded["pid"] == pid and decoded["level"] == 3 and decoded["seq"] == 5 \
+                and decoded["inventory"]["linemate"] == 2 and decoded["inventory"]["thystame"] == 1 \
+                and decoded["inventory"]["sibur"] == 0:
+            print(f"✓ Round trip OK ({len(message)} chars)")
+        else:
+            print(f"✗ Round trip changed the message: {decoded}")
+            ok = False
+
+        foreign = [TeamCodec("beta").decode(message), codec.decode("L2:READY_TEAM:none:SAFE"),
+                   codec.decode(message[:-1]), codec.decode("")]
+        if all(parsed is None for parsed in foreign):
+            print("✓ Other teams' and malformed messages rejected")
+        else:
+            print(f"✗ Foreign message accepted: {foreign}")
+            ok = False
+        return ok
+
+    def test_teammate_registry(self):
+        """Test 4: Teammates expire once they stop broadcasting"""
+        print("\n=== TEST 4: Teammate Registry ===")
+        from team_registry import TeammateRegistry
+        from time_model import TimeModel
+
+        class SimulatedClock:
+            now = 1000.0
+            def __call__(self):
+                return self.now
+        clock = SimulatedClock()
+        # timeout of 300 units: 3 seconds at the default f=100
+        registry = TeammateRegistry(TimeModel(clock=clock), timeout=300)
+        forgotten = []
+        registry.on_forget.append(forgotten.append)
+
+        registry.touch("a", "1")
+        registry.set_level("a", 2)
+        registry.touch("b", "5")
+        registry.set_level("b", 2)
+        clock.now += 2.0
+        registry.touch("b", "5")
+        before = registry.live_count(2)
+        clock.now += 1.5
+        after = registry.live_count(2)
+
+        if before == 2 and after == 1 and "a" not in registry and "b" in registry \
+                and registry.expired == 1 and forgotten == ["a"]:
+            print("✓ Silent teammate expired, refreshed one kept")
+            return True
+        print(f"✗ Registry expiry wrong: {before} then {after} live, forgotten {forgotten}")
+        return False
+
+    def test_inventory_ledger(self):
+        """Test 5: The inventory ledger tracks Take/Set and flags drift"""
+        print("\n=== TEST 5: Inventory Ledger ===")
+        from resources import InventoryLedger, parse_inventory
+
+        ledger = InventoryLedger(food_estimate=lambda: 7)
+        ok = True
+        unreconciled = ledger.drift
+        drifted = ledger.reconcile(parse_inventory("[food 9, linemate 1, sibur 2]"))
+        snapshot = ledger.apply("Take linemate", "ok")
+        if unreconciled and drifted and not ledger.drift and snapshot.get("linemate") == 2 \
+                and snapshot.get("food") == 7:
+            print("✓ Reconcile then Take keeps the ledger exact")
+        else:
+            print("✗ Ledger did not follow reconcile and Take")
+            ok = False
+
+        ledger.apply("Set sibur", "ko")
+        refused = ledger.drift and ledger.snapshot().get("sibur") == 0
+        ledger.reconcile(parse_inventory("[food 8, linemate 2, sibur 0]"))
+        if refused and not ledger.drift and ledger.mismatches == 1:
+            print("✓ Refused Set flags drift until the next Inventory")
+        else:
+            print("✗ Refused Set did not flag drift")
+            ok = False
+        return ok
+
+    def test_inventory_reconciliation(self):
+        """Test 6: A misread f still triggers Inventory reconciliation"""
+        print("\n=== TEST 6: Inventory Reconciliation ===")
+        from config import Config
+        from ai_controller import AdvancedAI
+        from resources import parse_inventory
+
+        config = Config(port=8080, name="test", machine="127.0.0.1")
+        ok = True
+
+        # The estimator has settled on f=200 while the server really runs at f=1000
+        ai = AdvancedAI(config)
+        estimator = ai.time_model.estimator
+        replied = 0.05
+        for _ in range(32):
+            estimator.observe(7, 0.0, replied)
+            replied += 7 / 200
+        waited = 3.5   # 3500 units at the real f, 700 by the estimate
+        ai.inventory_sent_at = time.time() - waited
+        ai._on_inventory_due()
+        if ai.time_model.confident() and ai.time_model.units(waited) < ai.reconcile_interval and ai.inventory_due:
+            print(f"✓ Wall-clock cap reconciles after {waited}s with f misread as {ai.time_model.frequency:.0f}")
+        else:
+            print("✗ A confident but wrong f delayed the Inventory past the wall-clock cap")
+            ok = False
+
+        # No back-to-back samples yet: reconcile every polling_interval, not reconcile_interval
+        ai = AdvancedAI(config)
+        ai.inventory_sent_at = time.time() - ai.time_model.seconds(ai.polling_interval + 10)
+        ai._on_inventory_due()
+        if not ai.time_model.confident() and ai.inventory_due:
+            print("✓ Unsettled f reconciles every polling interval")
+        else:
+            print("✗ Unsettled f waited for the full reconcile interval")
+            ok = False
+
+        # Leaving HUNGRY takes a real Inventory, not just a better prediction
+        survival = ai.survival
+        survival.anchor_units = survival.reserve_units
+        hungry = survival.get_mode() == "HUNGRY"
+        for _ in range(5):
+            survival.record_food_collected()
+        confirming = survival.get_mode() == "HUNGRY" and survival.needs_confirmation()
+        survival.update_from_inventory(parse_inventory("[food 15, linemate 0]"))
+        if hungry and confirming and survival.get_mode() == "SAFE" and not survival.needs_confirmation():
+            print("✓ HUNGRY is only left once an Inventory confirms the food")
+        else:
+            print("✗ HUNGRY was left on the prediction alone")
+            ok = False
+        return ok
+
+    def test_exploration_coverage(self, size=20, level=2, plans=150):
+        """Test 7: Frontier exploration covers the map over many plans"""
+        print("\n=== TEST 7: Exploration Coverage ===")
+        from exploration import FrontierExplorer
+        from navigation import PathPlanner
+        from time_model import TimeModel
+        from world_map import WorldMap
+        
+        class SimulatedClock:
+            """Stands in for time.time: 7 time units at f=100 per action"""
+            now = 1000.0
+            def __call__(self):
+                return self.now
+        clock = SimulatedClock()
+        
+        def explore(next_moves_for, count):
+            world = WorldMap(size, size, time_model=TimeModel(clock=clock))
+            explorer = FrontierExplorer(world, PathPlanner(size, size))
+            def look():
+                clock.now += 0.07
+                for tile in world.cone_tiles(level):
+                    world.seen_at[tile] = clock.now
+            look()
+            for _ in range(count):
+                for action in next_moves_for(explorer):
+                    world.apply_action(action)
+                    clock.now += 0.07
+                look()
+            return sum(1 for seen in world.seen_at if seen), clock.now
+        
+        start = clock.now
+        seen, end = explore(lambda explorer: explorer.next_moves(level), plans)
+        # A random walk given the same game time (one move and one Look per plan)
+        random.seed(0)
+        random_plans = int((end - start) / 0.14)
+        random_seen, _ = explore(lambda explorer: [random.choice(["Forward", "Right", "Left"])], random_plans)
+        
+        tiles = size * size
+        print(f"Explorer saw {seen}/{tiles} tiles in {plans} plans, random walk {random_seen}/{tiles} "
+              f"in {random_plans} plans of the same game time")
+        if seen >= 0.9 * tiles and seen > random_seen:
+            print("✓ Exploration coverage OK")
+            return True
+        print("✗ Exploration covers too little of the map")
+        return False
+    
     def run_all_tests(self):
         """Run all tests"""
         print("Starting AI tests...")
@@ -120,7 +309,14 @@ class AITester:
         # Test 2: Arguments
         self.test_argument_parsing()
         
-        # Test 3: Full connection (with test server)
+        # Tests 3-7: Team and inventory state, exploration (no server needed)
+        self.test_team_codec()
+        self.test_teammate_registry()
+        self.test_inventory_ledger()
+        self.test_inventory_reconciliation()
+        self.test_exploration_coverage()
+        
+        # Test 8: Full connection (with test server)
         self.start_test_server()
         try:
             self.test_basic_connection()
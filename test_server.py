@@ -80,15 +80,20 @@ class TestZappyServer:
             
             # Handle game commands
             while self.running:
-                command = self.receive_message(client_socket)
-                if not command:
+                data = self.receive_message(client_socket)
+                if not data:
                     break
                 
-                print(f"Received command from {addr}: {command}")
-                response = self.process_command(command)
-                
-                if response:
-                    self.send_message(client_socket, response)
+                # Clients pipeline commands, one recv may hold several lines
+                for command in data.split("\n"):
+                    command = command.strip()
+                    if not command:
+                        continue
+                    print(f"Received command from {addr}: {command}")
+                    response = self.process_command(command)
+                    
+                    if response:
+                        self.send_message(client_socket, response)
                     
         except Exception as e:
             print(f"Error handling client {addr}: {e}")